@@ -0,0 +1,291 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from .risk_utils import returns
+from optimization.risk_parity import risk_parity_weights, fill_pairwise_cov
+from optimization.black_litterman import bl_minimal, view_omega
+from optimization.constraints import project_boxed_simplex
+
+
+def rebalance_dates(index: pd.DatetimeIndex, freq: str = "M", min_history: int = 0):
+    """
+    Zwraca daty rebalansowania: ostatnia sesja każdego okresu (M = miesiąc, W = tydzień),
+    ale dopiero po zebraniu min_history obserwacji (przy krótszej historii - pusty indeks).
+    """
+    idx = pd.DatetimeIndex(index)
+    if len(idx) <= min_history:
+        return pd.DatetimeIndex([])
+    last = idx.to_series().groupby(idx.to_period(freq)).max()
+    dates = pd.DatetimeIndex(last.to_numpy())
+    return dates[dates >= idx[min_history]]
+
+
+def rolling_covariances(X: np.ndarray, ends, window: int, eps: float = 1e-8, pairwise: bool = False,
+                        min_periods: int = 20):
+    """
+    Generator kowariancji (n x n) w przesuwnym oknie X[end - window : end] dla kolejnych `ends`.
+
+    Zamiast liczyć kowariancję od zera dla każdej daty, trzymamy sumy:
+        s1 = Σ r_t,   s2 = Σ r_t r_tᵀ
+    i przy przesunięciu okna dodajemy nowe wiersze, a odejmujemy te, które z niego wypadły.
+    Koszt kroku to O(Δ·n²) zamiast O(window·n²). Na przekątną dodajemy eps, jak w shrink_cov.
+
+    pairwise=True (X z NaN): sumy liczone są po parach dostępnych obserwacji (M - maska danych):
+        N = MᵀM,   s1 = Xᵀ M (Σ x_i po dniach z x_j),   s2 = XᵀX   (braki jako 0)
+    a wynik domykany jak w shrink_cov(pairwise=True).
+    """
+    X = np.asarray(X, dtype=float)
+    n = X.shape[1]
+    M = (~np.isnan(X)).astype(float)
+    if pairwise:
+        X = np.nan_to_num(X)
+    s1, s2 = np.zeros((n, n) if pairwise else n), np.zeros((n, n))
+    cnt = np.zeros((n, n))
+    start = stop = 0
+
+    for end in ends:
+        new_start = max(end - window, 0)
+
+        if new_start >= stop:
+            # Okna się nie nakładają - taniej policzyć od zera
+            block, mask = X[new_start:end], M[new_start:end]
+            s2 = block.T @ block
+            if pairwise:
+                s1, cnt = block.T @ mask, mask.T @ mask
+            else:
+                s1 = block.sum(axis=0)
+        else:
+            add, drop = X[stop:end], X[start:new_start]
+            s2 = s2 + add.T @ add - drop.T @ drop
+            if pairwise:
+                m_add, m_drop = M[stop:end], M[start:new_start]
+                s1 = s1 + add.T @ m_add - drop.T @ m_drop
+                cnt = cnt + m_add.T @ m_add - m_drop.T @ m_drop
+            else:
+                s1 = s1 + add.sum(axis=0) - drop.sum(axis=0)
+        start, stop = new_start, end
+
+        if pairwise:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                cov = (s2 - s1 * s1.T / cnt) / (cnt - 1)
+            cov = fill_pairwise_cov(np.where(cnt >= 2, cov, np.nan), cnt, min_periods, eps)
+        else:
+            m = stop - start
+            mean = s1 / m
+            cov = (s2 - m * np.outer(mean, mean)) / (m - 1)
+        cov[np.diag_indices_from(cov)] += eps
+        yield cov
+
+
+def _weights_for_date(task):
+    """
+    Wagi wszystkich strategii dla jednej daty (funkcja na poziomie modułu, żeby dało się ją
+    wysłać do procesu w puli). Zwraca słownik {strategia: wektor wag}.
+    """
+    Sigma, tickers, p, active = task
+    if not active.all():
+        # Spółki bez wystarczającej historii w oknie (np. przed debiutem) dostają wagę 0
+        idx = np.flatnonzero(active)
+        sub_p = dict(p)
+        if p.get("views") is not None:
+            P, Q, conf = p["views"]
+            P = P[:, idx]
+            keep = np.abs(P).sum(axis=1) > 0
+            sub_p["views"] = (P[keep], Q[keep], conf[keep]) if keep.any() else None
+        sub = _weights_for_date((Sigma[np.ix_(idx, idx)], [tickers[i] for i in idx], sub_p,
+                                 np.ones(len(idx), dtype=bool)))
+        out = {}
+        for name, w_sub in sub.items():
+            out[name] = np.zeros(len(tickers))
+            out[name][idx] = w_sub
+        return out
+
+    w_rp = risk_parity_weights(pd.DataFrame(Sigma, index=tickers, columns=tickers),
+                               w_min=0.0, w_max=p["w_max"]).to_numpy()
+    out = {"RP": w_rp}
+
+    if p.get("views") is None:
+        return out
+
+    P, Q, conf = p["views"]
+    Sigma_ann = Sigma * p["trading_days"]
+    w_mkt = np.maximum(w_rp, 0)
+    w_mkt = w_mkt / w_mkt.sum()
+    Omega = view_omega(P, Sigma_ann, p["bl_tau"], conf, p["bl_omega_scale"])
+
+    try:
+        bl_out = bl_minimal(Sigma=Sigma_ann, w_mkt=w_mkt, delta=p["bl_delta"], tau=p["bl_tau"],
+                            P=P, Q=Q, Omega=Omega)
+    except Exception:
+        return out
+
+    w_bl_raw = np.asarray(bl_out["w_bl"], dtype=float)
+    w_bl = np.clip(np.nan_to_num(w_bl_raw), 0.0, None)
+    out["BL"] = w_bl / w_bl.sum() if w_bl.sum() > 0 else w_mkt
+    out["BL_Box"] = project_boxed_simplex(v=w_bl_raw, lb=p["bl_box_lb"], ub=p["bl_box_ub"], s=1.0)
+    return out
+
+
+def simulate_strategy(R: np.ndarray, weights: np.ndarray, reb_pos, cost_bps: float = 10.0):
+    """
+    Symulacja portfela z dryfem wag między rebalansowaniami.
+
+    R        - dzienne proste stopy zwrotu (T x n),
+    weights  - wagi docelowe ustalane na zamknięciu sesji reb_pos[k] (K x n),
+    cost_bps - koszt transakcyjny w punktach bazowych od obrotu (sum |Δw|).
+
+    Zwraca (dzienne zwroty portfela od pierwszego dnia po pierwszym rebalansie, obrót przy każdym rebalansie).
+    """
+    T, n = R.shape
+    ends = list(reb_pos[1:]) + [T - 1]
+    port = np.empty(T - 1 - reb_pos[0])
+    turnover = np.empty(len(reb_pos))
+    w_prev = np.zeros(n)  # Start z gotówki
+
+    for k, (pos, end) in enumerate(zip(reb_pos, ends)):
+        w = weights[k]
+        turnover[k] = np.abs(w - w_prev).sum()
+
+        # Wartości pozycji w okresie (pos, end] przy starcie z wag w
+        growth = w * np.cumprod(1.0 + R[pos + 1:end + 1], axis=0)
+        pv = growth.sum(axis=1)
+        prev = np.concatenate(([w.sum()], pv[:-1]))
+        r = pv / prev - 1.0
+
+        # Koszt transakcyjny obciąża pierwszy dzień po rebalansie
+        if len(r):
+            r[0] = (1.0 + r[0]) * (1.0 - turnover[k] * cost_bps / 1e4) - 1.0
+            w_prev = growth[-1] / pv[-1]
+        else:
+            w_prev = w
+
+        port[pos - reb_pos[0]:end - reb_pos[0]] = r
+
+    return port, turnover
+
+
+def summarize_backtest(rets: pd.DataFrame, turnover: pd.DataFrame, trading_days: int = 252,
+                       confidence: float = 0.99):
+    """
+    Tabela wyników: zwrot, zmienność, Max Drawdown, VaR 1D i obrót dla każdej strategii.
+    Średni obrót liczony jest bez pierwszego rebalansu (budowa portfela z gotówki = obrót 1.0).
+    """
+    alpha = 1.0 - confidence
+    rows = {}
+    for name in rets.columns:
+        r = rets[name].dropna()
+        cum = (1.0 + r).cumprod()
+        n_obs = max(len(r), 1)
+        rows[name] = {
+            "Zwrot całkowity": float(cum.iloc[-1] - 1.0) if len(r) else 0.0,
+            "Zwrot roczny": float(cum.iloc[-1] ** (trading_days / n_obs) - 1.0) if len(r) else 0.0,
+            "Zmienność roczna (σ)": float(r.std(ddof=1) * np.sqrt(trading_days)),
+            "Max Drawdown": float((cum / cum.cummax() - 1.0).min()) if len(r) else 0.0,
+            f"VaR 1D @ {confidence:.2%}": float(-np.quantile(r, alpha)) if len(r) else 0.0,
+            "Obrót początkowy": float(turnover[name].iloc[0]),  # Budowa portfela z gotówki
+            "Średni obrót": float(turnover[name].iloc[1:].mean()) if len(turnover) > 1 else 0.0,
+            "Liczba rebalansów": int(turnover[name].notna().sum()),
+        }
+    return pd.DataFrame(rows)
+
+
+def walk_forward_backtest(
+    prices: pd.DataFrame,
+    freq: str = "M",
+    window_days: int = 252,
+    cost_bps: float = 10.0,
+    trading_days: int = 252,
+    w_max: float = 0.20,
+    views=None,
+    bl_tau: float = 0.05,
+    bl_delta: float = 2.5,
+    bl_omega_scale: float = 1.0,
+    bl_box_lb: float = 0.05,
+    bl_box_ub: float = 0.12,
+    confidence: float = 0.99,
+    workers=None,
+    dropna_how: str = "any",
+    pairwise: bool = False,
+    min_periods: int = 20,
+    proxied: pd.DataFrame = None,
+):
+    """
+    Walk-forward backtest strategii RP, BL i BL_Box.
+
+    Dla każdej daty rebalansowania:
+    - kowariancja z ostatnich window_days log-zwrotów (aktualizowana przyrostowo),
+    - wagi liczone niezależnie dla każdej daty (pula procesów, workers=None -> liczba rdzeni),
+    - portfel trzymany do kolejnej daty z dryfem wag i kosztami transakcyjnymi.
+
+    views = (P, Q, conf) z build_views; gdy None, liczona jest tylko strategia RP.
+    dropna_how / pairwise - polityka braków jak w main.py: przy "all" + pairwise kowariancja liczona
+    jest z par obserwacji, a spółki z mniej niż min_periods notowaniami w oknie mają wagę 0.
+    proxied - maska cen proxy z prepare_prices: ceny proxy służą tylko do estymacji, spółka
+    przed debiutem ma wagę 0, a jej zwroty nie wchodzą do symulacji.
+    Uwaga: poglądy z arkusza wyceny są dzisiejsze, więc historyczne BL zawiera look-ahead.
+    """
+    tickers = list(prices.columns)
+    rets_log = returns(prices, log=True, how=dropna_how)
+    real_px = prices if proxied is None else prices.mask(
+        proxied.reindex(index=prices.index, columns=prices.columns, fill_value=False))
+    rets_simple = returns(real_px, log=False, how="all").reindex(rets_log.index)
+
+    dates = rebalance_dates(rets_log.index, freq=freq, min_history=window_days - 1)
+    reb_pos = rets_log.index.get_indexer(dates)
+
+    # Rebalans na ostatniej sesji nie ma okresu utrzymania (obrót bez kosztu) - pomijamy go
+    if len(reb_pos) and reb_pos[-1] == len(rets_log) - 1:
+        dates, reb_pos = dates[:-1], reb_pos[:-1]
+    if len(dates) == 0:
+        raise ValueError(f"Za krótka historia ({len(rets_log)} sesji) dla okna {window_days} dni.")
+
+    # Kowariancje przyrostowo (sekwencyjnie, tanio), optymalizacje równolegle (drogo)
+    params = {
+        "w_max": w_max, "views": views, "trading_days": trading_days,
+        "bl_tau": bl_tau, "bl_delta": bl_delta, "bl_omega_scale": bl_omega_scale,
+        "bl_box_lb": bl_box_lb, "bl_box_ub": bl_box_ub,
+    }
+    X = rets_log.to_numpy(dtype=float)
+    covs = rolling_covariances(X, reb_pos + 1, window_days, pairwise=pairwise, min_periods=min_periods)
+
+    # Liczba notowań każdej spółki w oknie kończącym się na dacie rebalansu
+    seen = np.vstack([np.zeros(len(tickers)), np.cumsum(~np.isnan(X), axis=0)])
+    starts = np.maximum(reb_pos + 1 - window_days, 0)
+    counts = seen[reb_pos + 1] - seen[starts]
+    active = counts >= min_periods if pairwise else np.ones_like(counts, dtype=bool)
+    if proxied is not None:
+        # Na dacie rebalansu spółka musi być już notowana (cena proxy = przed debiutem)
+        listed = ~proxied.reindex(index=rets_log.index, columns=tickers, fill_value=False).to_numpy()
+        active &= listed[reb_pos]
+
+    tasks = [(S, tickers, params, a) for S, a in zip(covs, active)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            solved = list(ex.map(_weights_for_date, tasks, chunksize=max(len(tasks) // (4 * workers), 1)))
+    else:
+        solved = [_weights_for_date(t) for t in tasks]
+
+    # Strategia jest w wynikach tylko, jeśli udało się ją policzyć dla każdej daty
+    strategies = [s for s in ("RP", "BL", "BL_Box") if all(s in out for out in solved)]
+
+    R = np.nan_to_num(rets_simple.to_numpy())
+    sim_index = rets_log.index[reb_pos[0] + 1:]
+    port_rets, turnovers, weights = {}, {}, {}
+    for s in strategies:
+        W = np.vstack([out[s] for out in solved])
+        port_rets[s], turnovers[s] = simulate_strategy(R, W, reb_pos, cost_bps=cost_bps)
+        weights[s] = pd.DataFrame(W, index=dates, columns=tickers)
+
+    rets_df = pd.DataFrame(port_rets, index=sim_index)
+    turnover_df = pd.DataFrame(turnovers, index=dates)
+
+    return {
+        "returns": rets_df,
+        "turnover": turnover_df,
+        "weights": weights,
+        "summary": summarize_backtest(rets_df, turnover_df, trading_days, confidence),
+    }
@@ -1,6 +1,8 @@
 import numpy as np
 import pandas as pd
-from .risk_utils import returns, to_simple, portfolio_nav_and_weights
+from scipy.stats import norm
+from optimization.factor_model import cov_matvec
+from .risk_utils import to_simple, portfolio_nav_and_weights, portfolio_returns
 
 # Empirycznie (na danych historycznych)
 def compute_empirical_risk(
@@ -10,23 +12,25 @@ def compute_empirical_risk(
     trading_days: int,
     risk_window_days: int,
     use_log_returns: bool = True,
-    confidence: float = 0.99
+    confidence: float = 0.99,
+    dropna_how: str = "any",
 ):
     """
     Oblicza empiryczne (historyczne) miary ryzyka portfela inwestycyjnego,
     czyli takie, które nie zakładają żadnego konkretnego rozkładu danych
     (np. normalnego). Wszystkie wskaźniki liczone są bezpośrednio z 
     historycznych obserwacji zwrotów.
+
+    dropna_how="all" zachowuje dni, w których brakuje notowań tylko spółek spoza portfela,
+    zamiast odrzucać cały dzień (dni z brakiem trzymanej spółki są pomijane, zob. portfolio_returns).
     """
 
     # Całkowita wartość portfela + wagi z ostatnich cen
     nav, weights_map, weights = portfolio_nav_and_weights(prices, holdings)
 
     # Zwroty portfela
-    rets = returns(prices, log=use_log_returns).dropna(axis=1, how="all")
-    rets = rets.tail(risk_window_days)
-    rets = rets.reindex(columns=weights_map.index).fillna(0.0)
-    port_rets_log = pd.Series(rets.to_numpy() @ weights, index=rets.index, name="Rp_log")
+    port_rets_log = portfolio_returns(prices, weights_map, weights, log=use_log_returns, how=dropna_how)
+    port_rets_log = port_rets_log.tail(risk_window_days)
     port_rets_simple = to_simple(port_rets_log, use_log_returns)
 
     # Odch. stand. (dzienne) na log-zwrotach / Zmienność dzienna (+ roczne)
@@ -65,4 +69,27 @@ def compute_empirical_risk(
         "es_h": es_h,
         "max_drawdown": mdd,
         "covariance": None
-    }
\ No newline at end of file
+    }
+
+
+# Parametrycznie (rozkład normalny, z macierzy kowariancji)
+def compute_parametric_var(Sigma, weights, nav: float, horizon_days: int = 1, confidence: float = 0.99):
+    """
+    VaR/ES przy założeniu normalności zwrotów: VaR = z · σ_p · NAV, σ_p² = wᵀ Σ w.
+    Sigma to dzienna kowariancja - pełna lub czynnikowa (wtedy wᵀΣw kosztuje O(n·k)).
+    """
+    w = np.asarray(weights, dtype=float)
+    daily_vol = float(np.sqrt(max(w @ cov_matvec(Sigma, w), 0.0)))
+
+    z = norm.ppf(confidence)
+    var_1d = z * daily_vol * nav
+    es_1d = norm.pdf(z) / (1.0 - confidence) * daily_vol * nav
+    root_h = np.sqrt(max(int(horizon_days), 1))
+
+    return {
+        "daily_vol": daily_vol,
+        "var_1d": var_1d,
+        "es_1d": es_1d,
+        "var_h": var_1d * root_h,
+        "es_h": es_1d * root_h,
+    }
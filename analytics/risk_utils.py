@@ -2,10 +2,15 @@ import numpy as np
 import pandas as pd
 
 # Zwroty log i proste
-def returns(prices: pd.DataFrame, log: bool = True):
-    """Zwraca dzienne zwroty log lub proste, bez pustych wierszy."""
+def returns(prices: pd.DataFrame, log: bool = True, how: str = "any"):
+    """
+    Zwraca dzienne zwroty log lub proste, bez pustych wierszy.
+    how="any" usuwa wiersze z jakimkolwiek brakiem, how="all" tylko całkowicie puste
+    (zachowuje historię, gdy jedna spółka ma luki lub później zadebiutowała).
+    """
     prices = prices.copy()
-    return (np.log(prices / prices.shift(1)) if log else prices.pct_change()).dropna(how="any")
+    rets = np.log(prices / prices.shift(1)) if log else prices.pct_change(fill_method=None)
+    return rets.dropna(how=how)
 
 def to_simple(r: pd.Series, log: bool):
     """Zamienia log-zwroty na proste (jeśli trzeba do np. Max Drawdown)."""
@@ -24,3 +29,14 @@ def portfolio_nav_and_weights(prices: pd.DataFrame, holdings: pd.Series):
     weights_map = (values / nav).fillna(0.0)
     weights_vec = weights_map.to_numpy() # Jaki procent nav przypada na każdą spółkę
     return nav, weights_map, weights_vec
+
+def portfolio_returns(prices: pd.DataFrame, weights_map: pd.Series, weights, log: bool = True, how: str = "any"):
+    """
+    Dzienne zwroty portfela o stałych wagach (log lub proste, wg `log`).
+    Dni, w których brakuje zwrotu którejkolwiek trzymanej spółki (waga != 0), są pomijane -
+    zerowy zwrot pozycji zaniżałby ryzyko. Spółki spoza portfela wchodzą z zerem (waga 0).
+    """
+    rets = returns(prices, log=log, how=how).reindex(columns=weights_map.index)
+    held = weights_map.index[np.asarray(weights) != 0]
+    rets = rets.dropna(subset=held, how="any").fillna(0.0)
+    return pd.Series(rets.to_numpy() @ weights, index=rets.index, name="Rp_log")
@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+
+from .risk_utils import portfolio_nav_and_weights
+
+# Domyślne okna historyczne (start, koniec)
+DEFAULT_WINDOWS = {
+    "2008 Lehman": ("2008-09-12", "2009-02-17"),
+    "COVID 03.2020": ("2020-02-21", "2020-03-23"),
+    "2022 WIG": ("2022-02-09", "2022-09-30"),
+}
+
+
+def _fill_proxy(S: pd.DataFrame, groups=None):
+    """
+    Uzupełnia brakujące szoki (spółki bez notowań w oknie) proxy:
+    najpierw średnią z grupy (jeśli jest mapowanie), potem średnią ze wszystkich spółek w scenariuszu.
+    Zwraca (uzupełnioną macierz, maskę prawdziwych danych).
+    """
+    real = S.notna()
+    if groups is not None:
+        g = pd.Series(groups).reindex(S.columns)
+        if g.notna().any():
+            group_mean = S.T.groupby(g).transform("mean").T
+            S = S.fillna(group_mean)
+    arr = S.to_numpy(dtype=float)
+    arr = np.where(np.isnan(arr), S.mean(axis=1).to_numpy()[:, None], arr)
+    return pd.DataFrame(arr, index=S.index, columns=S.columns).fillna(0.0), real
+
+
+def historical_scenarios(prices: pd.DataFrame, windows: dict):
+    """
+    Macierz szoków (scenariusze x spółki): zwrot prosty każdej spółki od początku do końca okna.
+    Cena startowa = ostatnie notowanie nie później niż data startu; brak danych -> NaN.
+    """
+    px = prices.sort_index()
+    rows = {}
+    for name, (start, end) in windows.items():
+        before = px.loc[:pd.Timestamp(start)]
+        inside = px.loc[pd.Timestamp(start):pd.Timestamp(end)]
+        if before.empty or inside.empty:
+            rows[name] = pd.Series(np.nan, index=px.columns)
+            continue
+        first = before.ffill().iloc[-1]  # Ostatnia cena przed startem okna
+        last = inside.ffill().iloc[-1]   # Ostatnia cena w oknie
+        rows[name] = last / first - 1.0
+    return pd.DataFrame(rows).T.reindex(columns=prices.columns)
+
+
+def rolling_scenarios(prices: pd.DataFrame, horizon_days: int = 20):
+    """
+    Wszystkie nakładające się okna horizon_days sesji z historii jako scenariusze.
+    Szok w scenariuszu t = P[t + h] / P[t] - 1 (liczone naraz dla całej macierzy cen).
+    """
+    px = prices.sort_index().ffill()
+    arr = px.to_numpy(dtype=float)
+    h = int(horizon_days)
+    if len(arr) <= h:
+        return pd.DataFrame(columns=prices.columns, dtype=float)
+    R = arr[h:] / arr[:-h] - 1.0
+    index = [f"{h}D od {d:%Y-%m-%d}" for d in px.index[:-h]]
+    return pd.DataFrame(R, index=index, columns=prices.columns)
+
+
+def shock_scenarios(shocks: dict, tickers, groups=None):
+    """
+    Hipotetyczne szoki z konfiguracji, np.:
+        {"Banki -30%": {"Banki": -0.30}, "Rynek -10%": {"*": -0.10, "PKN.WA": -0.25}}
+    Klucz może być tickerem, nazwą grupy (z mapowania) albo '*' (wszystkie spółki).
+    Pierwszeństwo: ticker > grupa > '*'.
+    """
+    tickers = list(tickers)
+    g = pd.Series(groups).reindex(tickers) if groups is not None else pd.Series(np.nan, index=tickers)
+    group_names = set(g.dropna())
+
+    def norm(t):
+        t = str(t).replace("WSE:", "").strip().upper()
+        return t if t.endswith(".WA") else f"{t}.WA"
+
+    rows = {}
+    for name, spec in shocks.items():
+        row = pd.Series(float(spec.get("*", 0.0)), index=tickers)
+        for key, val in spec.items():
+            if key == "*":
+                continue
+            if key in group_names:
+                row[(g == key).to_numpy()] = float(val)
+        for key, val in spec.items():
+            if key == "*" or key in group_names:
+                continue
+            t = norm(key)
+            if t not in row.index:
+                raise ValueError(f"Nieznany ticker lub grupa w szoku '{name}': {key}")
+            row[t] = float(val)
+        rows[name] = row
+    return pd.DataFrame(rows, index=tickers).T if rows else pd.DataFrame(columns=tickers, dtype=float)
+
+
+def stress_pnl(S: pd.DataFrame, values: pd.Series):
+    """Zysk/strata (PLN) dla wszystkich scenariuszy naraz: S (m x n) @ wartości pozycji (n)."""
+    v = values.reindex(S.columns).fillna(0.0).to_numpy(dtype=float)
+    return pd.Series(S.to_numpy(dtype=float) @ v, index=S.index, name="P&L (PLN)")
+
+
+def run_stress_tests(
+    prices: pd.DataFrame,
+    holdings: pd.Series,
+    history: pd.DataFrame = None,
+    windows: dict = None,
+    shocks: dict = None,
+    groups=None,
+    rolling_horizon_days: int = 20,
+    top_n: int = 10,
+):
+    """
+    Stress testy bieżącego portfela:
+    - okna historyczne (windows) odtwarzane na cenach z `history`,
+    - wszystkie nakładające się okna rolling_horizon_days z `history` (do top_n najgorszych w raporcie),
+    - hipotetyczne szoki (shocks) per ticker / grupa.
+
+    Wszystkie scenariusze są oceniane jednym iloczynem macierzy szoków i wektora wartości pozycji.
+    """
+    nav, weights_map, _ = portfolio_nav_and_weights(prices, holdings)
+    values = weights_map * nav
+    history = prices if history is None else history.reindex(columns=prices.columns)
+    windows = DEFAULT_WINDOWS if windows is None else windows
+
+    parts, kinds, coverage = [], [], []
+
+    hist = historical_scenarios(history, windows)
+    if not hist.empty:
+        hist, real = _fill_proxy(hist, groups)
+        parts.append(hist)
+        kinds += ["historyczny"] * len(hist)
+        coverage.append(real.to_numpy(dtype=float) @ values.reindex(hist.columns).fillna(0.0).to_numpy())
+
+    if shocks:
+        hyp = shock_scenarios(shocks, prices.columns, groups)
+        parts.append(hyp)
+        kinds += ["hipotetyczny"] * len(hyp)
+        coverage.append(np.full(len(hyp), nav))
+
+    if rolling_horizon_days:
+        roll = rolling_scenarios(history, rolling_horizon_days)
+        if not roll.empty:
+            roll, real = _fill_proxy(roll, groups)
+            parts.append(roll)
+            kinds += ["kroczący"] * len(roll)
+            coverage.append(real.to_numpy(dtype=float) @ values.reindex(roll.columns).fillna(0.0).to_numpy())
+
+    if not parts:
+        raise ValueError("Brak scenariuszy do oceny.")
+
+    S = pd.concat(parts)
+    dup = S.index[S.index.duplicated()].unique()
+    if len(dup):
+        raise ValueError(f"Powtórzone nazwy scenariuszy (okna / szoki): {', '.join(map(str, dup))}")
+    pnl = stress_pnl(S, values)
+
+    table = pd.DataFrame({
+        "Typ": kinds,
+        "P&L (PLN)": pnl.to_numpy(),
+        "Zmiana portfela": pnl.to_numpy() / nav,
+        "Pokrycie danych": np.concatenate(coverage) / nav,
+    }, index=S.index)
+    table.index.name = "Scenariusz"
+
+    # Do raportu: wszystkie nazwane scenariusze + top_n najgorszych okien kroczących
+    named = table[table["Typ"] != "kroczący"]
+    worst = table[table["Typ"] == "kroczący"].nsmallest(top_n, "P&L (PLN)")
+    summary = pd.concat([named, worst])
+
+    detail = S.loc[named.index].mul(values.reindex(S.columns).fillna(0.0), axis=1)
+    detail.index.name = "Scenariusz"
+
+    return {"summary": summary, "detail": detail, "all": table}
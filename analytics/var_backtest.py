@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.stats import binom, chi2
+
+from .risk_utils import to_simple, portfolio_nav_and_weights, portfolio_returns
+
+
+def rolling_historical_var(port_rets: pd.Series, window: int, confidence: float = 0.99):
+    """
+    Prognozy VaR 1D (jako dodatnia strata w ujęciu stopy zwrotu) metodą symulacji historycznej.
+
+    Prognoza na dzień t korzysta wyłącznie z okna [t - window, t), czyli jest out-of-sample.
+    Kwantyle dla wszystkich dni liczone są naraz na widoku przesuwnych okien (bez pętli po dniach).
+    """
+    r = port_rets.to_numpy(dtype=float)
+    if len(r) <= window:
+        raise ValueError(f"Za krótka historia ({len(r)} sesji) dla okna {window} dni.")
+
+    windows = sliding_window_view(r[:-1], window)  # Okno kończące się dzień przed prognozą
+    var = -np.quantile(windows, 1.0 - confidence, axis=1)
+    return pd.Series(var, index=port_rets.index[window:], name="VaR_1d")
+
+
+def kupiec_pof(n_obs: int, n_exc: int, confidence: float = 0.99):
+    """
+    Test Kupca (Proportion of Failures): czy udział przekroczeń zgadza się z 1 - confidence.
+    Zwraca (statystyka LR, p-value) — LR ~ chi2(1).
+    """
+    p = 1.0 - confidence
+    x, n = int(n_exc), int(n_obs)
+    phat = x / n if n else 0.0
+
+    def loglik(q):
+        # x*log(q) + (n-x)*log(1-q) z konwencją 0*log(0) = 0
+        a = x * np.log(q) if x > 0 else 0.0
+        b = (n - x) * np.log(1.0 - q) if n - x > 0 else 0.0
+        return a + b
+
+    lr = -2.0 * (loglik(p) - loglik(phat))
+    lr = max(float(lr), 0.0)
+    return lr, float(chi2.sf(lr, df=1))
+
+
+def christoffersen_independence(exceptions):
+    """
+    Test niezależności Christoffersena: czy przekroczenia nie występują seriami.
+    Liczy przejścia 0/1 między kolejnymi dniami (łańcuch Markowa). LR ~ chi2(1).
+    """
+    e = np.asarray(exceptions, dtype=int)
+    prev, curr = e[:-1], e[1:]
+    n00 = int(np.sum((prev == 0) & (curr == 0)))
+    n01 = int(np.sum((prev == 0) & (curr == 1)))
+    n10 = int(np.sum((prev == 1) & (curr == 0)))
+    n11 = int(np.sum((prev == 1) & (curr == 1)))
+
+    def ll(n_stay, n_move, q):
+        a = n_move * np.log(q) if n_move > 0 else 0.0
+        b = n_stay * np.log(1.0 - q) if n_stay > 0 else 0.0
+        return a + b
+
+    pi01 = n01 / (n00 + n01) if (n00 + n01) else 0.0
+    pi11 = n11 / (n10 + n11) if (n10 + n11) else 0.0
+    pi = (n01 + n11) / (n00 + n01 + n10 + n11) if len(prev) else 0.0
+
+    lr = -2.0 * (ll(n00 + n10, n01 + n11, pi) - ll(n00, n01, pi01) - ll(n10, n11, pi11))
+    lr = max(float(lr), 0.0)
+    return lr, float(chi2.sf(lr, df=1))
+
+
+def traffic_light(n_obs: int, n_exc: int, confidence: float = 0.99):
+    """
+    Strefa bazylejska na podstawie rozkładu dwumianowego liczby przekroczeń:
+    zielona gdy P(X <= x) < 95%, żółta gdy < 99.99%, w przeciwnym razie czerwona.
+    Dla 250 obserwacji i 99% daje to klasyczne progi 0–4 / 5–9 / 10+.
+    """
+    cdf = binom.cdf(n_exc, n_obs, 1.0 - confidence)
+    if cdf < 0.95:
+        return "zielona"
+    if cdf < 0.9999:
+        return "żółta"
+    return "czerwona"
+
+
+def backtest_var(
+    prices: pd.DataFrame,
+    holdings: pd.Series,
+    window_days: int = 252,
+    use_log_returns: bool = True,
+    confidence: float = 0.99,
+    traffic_light_days: int = 250,
+    dropna_how: str = "any",
+    proxied: pd.DataFrame = None,
+):
+    """
+    Walidacja VaR z compute_empirical_risk na całej historii cen.
+
+    - zwroty portfela o bieżących wagach (jak w compute_empirical_risk),
+    - prognoza VaR 1D na każdy dzień z poprzedzającego okna window_days,
+    - przekroczenia: zrealizowana strata > VaR,
+    - testy Kupca i Christoffersena oraz strefa bazylejska z ostatnich traffic_light_days dni.
+
+    proxied - maska cen odtworzonych proxy (z prepare_prices): wchodzą do prognoz VaR,
+    ale nie do zrealizowanych zwrotów (dni sprzed debiutu trzymanej spółki nie są oceniane).
+    """
+    nav, weights_map, weights = portfolio_nav_and_weights(prices, holdings)
+    port_rets = portfolio_returns(prices, weights_map, weights, log=use_log_returns, how=dropna_how)
+    port_rets = to_simple(port_rets, use_log_returns)
+
+    var = rolling_historical_var(port_rets, window_days, confidence)
+    realized = port_rets
+    if proxied is not None and proxied.to_numpy().any():
+        real_px = prices.mask(proxied.reindex(index=prices.index, columns=prices.columns, fill_value=False))
+        realized = portfolio_returns(real_px, weights_map, weights, log=use_log_returns, how=dropna_how)
+        realized = to_simple(realized, use_log_returns)
+    realized = realized.reindex(var.index).dropna()
+    if realized.empty:
+        raise ValueError("Brak zrealizowanych zwrotów (bez proxy) w okresie prognoz VaR.")
+    var = var.reindex(realized.index)
+    exceptions = (realized < -var).astype(int)
+
+    series = pd.DataFrame({
+        "Zwrot": realized,
+        "VaR 1D": var,
+        "VaR 1D (PLN)": var * nav,
+        "Przekroczenie": exceptions,
+    })
+    series.index.name = "Data"
+
+    n_obs, n_exc = len(exceptions), int(exceptions.sum())
+    lr_pof, p_pof = kupiec_pof(n_obs, n_exc, confidence)
+    lr_ind, p_ind = christoffersen_independence(exceptions)
+    lr_cc = lr_pof + lr_ind
+
+    recent = exceptions.tail(traffic_light_days)
+
+    summary = pd.Series({
+        "Poziom ufności": confidence,
+        "Okno estymacji (sesje)": window_days,
+        "Liczba prognoz": n_obs,
+        "Liczba przekroczeń": n_exc,
+        "Oczekiwana liczba przekroczeń": n_obs * (1.0 - confidence),
+        "Udział przekroczeń": n_exc / n_obs,
+        "Kupiec LR (POF)": lr_pof,
+        "Kupiec p-value": p_pof,
+        "Christoffersen LR (ind)": lr_ind,
+        "Christoffersen p-value": p_ind,
+        "LR (cc) = POF + ind": lr_cc,
+        "p-value (cc)": float(chi2.sf(lr_cc, df=2)),
+        f"Przekroczenia w ost. {len(recent)} dniach": int(recent.sum()),
+        "Strefa bazylejska": traffic_light(len(recent), int(recent.sum()), confidence),
+    }).to_frame("Wartość")
+
+    return {"series": series, "summary": summary}
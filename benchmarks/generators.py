@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+# Rozmiary danych syntetycznych: (liczba spółek, liczba lat notowań)
+SIZES = {
+    "small": (20, 2),
+    "medium": (200, 5),
+    "large": (2000, 20),
+}
+
+SESSIONS_PER_YEAR = 252
+
+
+def make_tickers(n_tickers: int):
+    """Zwraca listę sztucznych tickerów w formacie GPW (np. 'T0001.WA')."""
+    return [f"T{i:04d}.WA" for i in range(n_tickers)]
+
+
+def make_prices(n_tickers: int, n_years: int, seed: int = 0, listing_gap_ratio: float = 0.0,
+                end_date="2024-12-31"):
+    """
+    Generuje panel cen (daty x tickery) z modelu jednoczynnikowego:
+    r_i = beta_i * r_rynku + e_i, a ceny to skumulowane log-zwroty.
+
+    listing_gap_ratio > 0 -> część spółek „debiutuje” później (NaN na początku historii),
+    co pozwala testować obsługę brakujących danych.
+    """
+    rng = np.random.default_rng(seed)
+    n_days = int(n_years * SESSIONS_PER_YEAR)
+    dates = pd.bdate_range(end=end_date, periods=n_days)
+    tickers = make_tickers(n_tickers)
+
+    market = rng.normal(0.0003, 0.011, size=n_days)
+    beta = rng.uniform(0.5, 1.5, size=n_tickers)
+    idio_vol = rng.uniform(0.008, 0.025, size=n_tickers)
+    eps = rng.standard_normal((n_days, n_tickers)) * idio_vol
+
+    log_rets = market[:, None] * beta[None, :] + eps
+    log_rets[0] = 0.0
+    start = rng.uniform(10.0, 200.0, size=n_tickers)
+    prices = start * np.exp(np.cumsum(log_rets, axis=0))
+
+    # Późniejsze debiuty części spółek
+    if listing_gap_ratio > 0:
+        n_late = int(round(n_tickers * listing_gap_ratio))
+        late = rng.choice(n_tickers, size=n_late, replace=False)
+        first = rng.integers(1, max(n_days // 2, 2), size=n_late)
+        rows = np.arange(n_days)[:, None]
+        prices[:, late] = np.where(rows < first[None, :], np.nan, prices[:, late])
+
+    return pd.DataFrame(prices, index=dates, columns=tickers)
+
+
+def make_trades(tickers, n_trades: int, seed: int = 0, start_date="2015-01-01", end_date="2024-12-31"):
+    """
+    Generuje dziennik transakcji w formacie zwracanym przez load_trades:
+    [Data, Ticker, Typ, Ilosc]. Około 80% transakcji to BUY.
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(start=start_date, end=end_date)
+
+    trades = pd.DataFrame({
+        "Data": np.sort(rng.choice(days.to_numpy(), size=n_trades)),
+        "Ticker": rng.choice(np.asarray(tickers, dtype=object), size=n_trades),
+        "Typ": np.where(rng.random(n_trades) < 0.8, "BUY", "SELL"),
+        "Ilosc": rng.integers(1, 500, size=n_trades).astype(float),
+    })
+    return trades
+
+
+def make_valuation(tickers, seed: int = 0):
+    """
+    Generuje arkusz wyceny w formacie zwracanym przez load_valuation_sheet:
+    [Ticker, TargetPrice, PriceAtPublication, Confidence, Views].
+    """
+    rng = np.random.default_rng(seed)
+    n = len(tickers)
+
+    price = rng.uniform(10.0, 200.0, size=n)
+    upside = rng.normal(0.15, 0.2, size=n)
+    df = pd.DataFrame({
+        "Ticker": list(tickers),
+        "TargetPrice": price * (1.0 + upside),
+        "PriceAtPublication": price,
+        "Confidence": rng.uniform(0.3, 0.9, size=n),
+    })
+    df["Views"] = df["TargetPrice"] / df["PriceAtPublication"] - 1
+    return df
+
+
+def make_holdings(tickers, seed: int = 0):
+    """Losowa liczba akcji dla każdej spółki (Series o nazwie 'qty')."""
+    rng = np.random.default_rng(seed)
+    return pd.Series(rng.integers(0, 1000, size=len(tickers)).astype(float), index=list(tickers), name="qty")
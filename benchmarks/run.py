@@ -0,0 +1,107 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from .generators import SIZES
+from .suite import BENCHMARKS
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+
+def time_call(fn, repeat=5, min_time=0.2):
+    """
+    Mierzy czas wywołania fn: najlepszy (minimalny) czas z `repeat` prób.
+    Przy bardzo szybkich funkcjach próba to pętla, aż uzbiera się min_time sekund.
+    """
+    fn()  # Rozgrzewka (cache, import leniwych modułów)
+
+    best = float("inf")
+    for _ in range(repeat):
+        loops, t0 = 0, time.perf_counter()
+        while True:
+            fn()
+            loops += 1
+            elapsed = time.perf_counter() - t0
+            if elapsed >= min_time or loops >= 1000:
+                break
+        best = min(best, elapsed / loops)
+    return best
+
+
+def load_baseline(path=BASELINE_PATH):
+    path = Path(path)
+    if not path.is_file():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    baseline = load_baseline(path)
+    baseline.update(results)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(baseline.items())), f, indent=2)
+        f.write("\n")
+
+
+def run(names, sizes, repeat=5):
+    """Uruchamia wybrane benchmarki i zwraca słownik {'nazwa[rozmiar]': sekundy}."""
+    results = {}
+    for size in sizes:
+        for name in names:
+            key = f"{name}[{size}]"
+            fn = BENCHMARKS[name](size)
+            try:
+                results[key] = time_call(fn, repeat=repeat)
+            finally:
+                cleanup = getattr(fn, "cleanup", None)  # Np. pliki tymczasowe benchmarku
+                if cleanup:
+                    cleanup()
+            print(f"{key:<40} {results[key] * 1e3:12.3f} ms")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Zwraca listę (klucz, czas, baseline, stosunek) dla funkcji wolniejszych niż threshold x baseline."""
+    regressions = []
+    for key, t in results.items():
+        ref = baseline.get(key)
+        if ref and t > ref * threshold:
+            regressions.append((key, t, ref, t / ref))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarki funkcji ryzyka i optymalizacji (offline).")
+    parser.add_argument("--size", nargs="+", choices=list(SIZES), default=["small"])
+    parser.add_argument("--bench", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=2.0,
+                        help="Dopuszczalny stosunek czas / baseline (domyślnie 2.0)")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--save-baseline", action="store_true", help="Zapisz wyniki jako nowy baseline")
+    args = parser.parse_args(argv)
+
+    results = run(args.bench, args.size, repeat=args.repeat)
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Zapisano baseline do: {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    missing = [k for k in results if k not in baseline]
+    if missing:
+        print(f"[WARN] Brak baseline dla: {', '.join(missing)}", file=sys.stderr)
+
+    regressions = compare(results, baseline, args.threshold)
+    for key, t, ref, ratio in regressions:
+        print(f"[ERROR] Regresja {key}: {t * 1e3:.3f} ms vs {ref * 1e3:.3f} ms (x{ratio:.2f})", file=sys.stderr)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+from analytics.risk_metrics import compute_empirical_risk
+from analytics.risk_utils import returns
+from data.portfolio_loader import build_holdings
+from optimization.risk_parity import shrink_cov, risk_parity_weights
+from optimization.black_litterman import bl_minimal
+from optimization.constraints import project_boxed_simplex
+from optimization.factor_model import pca_factor_model, cov_scale
+from reporting.exporter import export_report_xlsx
+from .generators import SIZES, make_prices, make_trades, make_valuation, make_holdings
+
+# Liczba transakcji w dzienniku dla danego rozmiaru
+# (build_holdings trzyma gęstą macierz transakcje x spółki, stąd umiarkowane liczby)
+N_TRADES = {"small": 1_000, "medium": 5_000, "large": 10_000}
+
+# SLSQP w risk_parity_weights skaluje się bardzo źle z liczbą spółek,
+# więc dla RP ograniczamy uniwersum niezależnie od rozmiaru panelu.
+RP_MAX_TICKERS = {"small": 20, "medium": 50, "large": 100}
+
+
+def _panel(size, seed=0):
+    n_tickers, n_years = SIZES[size]
+    return make_prices(n_tickers, n_years, seed=seed)
+
+
+def _bl_inputs(prices, tau=0.05, trading_days=252, r_f=0.055, seed=0):
+    """Buduje (Sigma_ann, w_mkt, P, Q, Omega) tak jak main.py (jeden pogląd na spółkę)."""
+    Sigma_ann = shrink_cov(returns(prices, log=True)).to_numpy() * trading_days
+    n = Sigma_ann.shape[0]
+    val = make_valuation(prices.columns, seed=seed)
+
+    P = np.eye(n)
+    Q = val["Views"].to_numpy() - r_f
+    conf = val["Confidence"].clip(1e-6, 1.0).to_numpy()
+    base = np.clip(np.diag(P @ (tau * Sigma_ann) @ P.T), 1e-12, None)
+    Omega = np.diag(base / (conf ** 2))
+    w_mkt = np.full(n, 1.0 / n)
+    return Sigma_ann, w_mkt, P, Q, Omega
+
+
+# Każdy benchmark: nazwa -> funkcja(size) zwracająca bezargumentowe wywołanie do zmierzenia
+
+def bench_compute_empirical_risk(size):
+    prices = _panel(size)
+    holdings = make_holdings(prices.columns)
+    return lambda: compute_empirical_risk(
+        prices=prices, holdings=holdings, horizon_days=20, trading_days=252,
+        risk_window_days=252, use_log_returns=True, confidence=0.99,
+    )
+
+
+def bench_build_holdings(size):
+    n_tickers, _ = SIZES[size]
+    trades = make_trades(make_prices(n_tickers, 1).columns, N_TRADES[size])
+    return lambda: build_holdings(trades)
+
+
+def bench_shrink_cov(size):
+    rets = returns(_panel(size), log=True)
+    return lambda: shrink_cov(rets)
+
+
+def bench_risk_parity_weights(size):
+    prices = _panel(size).iloc[:, :RP_MAX_TICKERS[size]]
+    Sigma = shrink_cov(returns(prices, log=True))
+    return lambda: risk_parity_weights(Sigma, w_min=0.0, w_max=0.2)
+
+
+def bench_bl_minimal(size):
+    Sigma_ann, w_mkt, P, Q, Omega = _bl_inputs(_panel(size))
+    return lambda: bl_minimal(Sigma=Sigma_ann, w_mkt=w_mkt, delta=2.5, tau=0.05, P=P, Q=Q, Omega=Omega)
+
+
+def bench_pca_factor_model(size):
+    rets = returns(_panel(size), log=True)
+    return lambda: pca_factor_model(rets, k=5)
+
+
+def bench_risk_parity_weights_factor(size):
+    # Model czynnikowy + ccd skaluje się do pełnego panelu (bez limitu RP_MAX_TICKERS)
+    fm = pca_factor_model(returns(_panel(size), log=True), k=5)
+    return lambda: risk_parity_weights(fm, w_min=0.0, w_max=0.2, method="ccd")
+
+
+def bench_bl_minimal_factor(size):
+    prices = _panel(size)
+    _, w_mkt, P, Q, Omega = _bl_inputs(prices)
+    fm = cov_scale(pca_factor_model(returns(prices, log=True), k=5), 252)
+    return lambda: bl_minimal(Sigma=fm, w_mkt=w_mkt, delta=2.5, tau=0.05, P=P, Q=Q, Omega=Omega)
+
+
+def bench_project_boxed_simplex(size):
+    n_tickers, _ = SIZES[size]
+    v = np.random.default_rng(0).normal(0.0, 0.3, size=n_tickers)
+    lb, ub = 0.0, max(0.2, 2.0 / n_tickers)
+    return lambda: project_boxed_simplex(v=v, lb=lb, ub=ub, s=1.0)
+
+
+def bench_export_report_xlsx(size):
+    prices = _panel(size)
+    holdings = make_holdings(prices.columns)
+    risk_emp = compute_empirical_risk(prices, holdings, 20, 252, 252)
+    w = pd.Series(1.0 / prices.shape[1], index=prices.columns)
+    out_dir = tempfile.TemporaryDirectory(prefix="bench_export_")
+
+    def run():
+        export_report_xlsx(
+            output_path=os.path.join(out_dir.name, "report.xlsx"), cfg_path="config.yaml",
+            start_date=str(prices.index[0].date()), end_date=str(prices.index[-1].date()),
+            risk_emp=risk_emp, cash_balance=0.0, var_conf=0.99, var_h=20,
+            holdings=holdings, prices=prices, w_rp=w, bl_weights=w, bl_weights_box=w,
+            n_tickers=prices.shape[1],
+        )
+    run.cleanup = out_dir.cleanup  # Runner usuwa katalog po pomiarze
+    return run
+
+
+BENCHMARKS = {
+    "compute_empirical_risk": bench_compute_empirical_risk,
+    "build_holdings": bench_build_holdings,
+    "shrink_cov": bench_shrink_cov,
+    "risk_parity_weights": bench_risk_parity_weights,
+    "bl_minimal": bench_bl_minimal,
+    "pca_factor_model": bench_pca_factor_model,
+    "risk_parity_weights_factor": bench_risk_parity_weights_factor,
+    "bl_minimal_factor": bench_bl_minimal_factor,
+    "project_boxed_simplex": bench_project_boxed_simplex,
+    "export_report_xlsx": bench_export_report_xlsx,
+}
@@ -0,0 +1,24 @@
+from pathlib import Path
+import pandas as pd
+
+def load_group_map(path):
+    """
+    Czyta mapowanie spółek na grupy (np. sektory) z pliku CSV lub Excel
+    z kolumnami: Ticker, Grupa (albo Group).
+    Zwraca Series: indeks = ticker (z sufiksem .WA), wartość = nazwa grupy.
+    """
+    path = Path(path)
+    df = pd.read_csv(path, dtype=str) if path.suffix.lower() == ".csv" else pd.read_excel(path, dtype=str)
+
+    group_col = "Grupa" if "Grupa" in df.columns else "Group"
+    miss = [c for c in ("Ticker", group_col) if c not in df.columns]
+    if miss:
+        raise ValueError(f"Brak kolumn lub literówka: {miss}")
+
+    tickers = (df["Ticker"].astype(str)
+                 .str.replace("WSE:", "", regex=False)
+                 .str.strip().str.upper()
+                 .apply(lambda x: x if x.endswith(".WA") else f"{x}.WA"))
+    groups = df[group_col].astype(str).str.strip()
+
+    return pd.Series(groups.to_numpy(), index=tickers.to_numpy(), name="Grupa")
@@ -1,9 +1,36 @@
+from pathlib import Path
+import pandas as pd
 import yfinance as yf
 
-def get_prices(tickers, start_date, end_date=None):
+def _cache_file(cache_dir, ticker):
+    return Path(cache_dir) / f"{ticker}.csv"
+
+def _read_cache(cache_dir, tickers):
+    """Czyta ceny z cache (jeden plik CSV na ticker). Brakujące tickery są pomijane."""
+    cols = {}
+    for t in tickers:
+        path = _cache_file(cache_dir, t)
+        if path.is_file():
+            cols[t] = pd.read_csv(path, index_col=0, parse_dates=True).iloc[:, 0]
+    return pd.DataFrame(cols)
+
+def _write_cache(cache_dir, prices):
+    """Dopisuje pobrane ceny do cache, łącząc je z tym, co już tam jest."""
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    old = _read_cache(cache_dir, prices.columns)
+    for t in prices.columns:
+        s = prices[t].dropna()
+        if t in old.columns:
+            s = s.combine_first(old[t].dropna())
+        s.rename(t).to_csv(_cache_file(cache_dir, t), index_label="Date")
+
+def get_prices(tickers, start_date, end_date=None, cache_dir=None, offline=False):
     """
     Pobiera ceny z Yahoo Finance dla podanych tickerów.
     Zwraca DataFrame z kolumnami (tickery) i wierszami (daty).
+
+    cache_dir - katalog z cache cen (CSV na ticker); pobrane dane są do niego dopisywane,
+    offline   - nie łączy się z Yahoo, czyta wyłącznie z cache_dir.
     """
 
     def norm(t):
@@ -14,6 +41,15 @@ def get_prices(tickers, start_date, end_date=None):
     else:
         tickers = norm(tickers)
 
+    if offline:
+        if not cache_dir:
+            raise ValueError("Tryb offline wymaga katalogu cache (cache_dir).")
+        prices = _read_cache(cache_dir, tickers if isinstance(tickers, list) else [tickers])
+        prices = prices.sort_index().loc[pd.Timestamp(start_date):]
+        if end_date is not None:
+            prices = prices.loc[:pd.Timestamp(end_date)]
+        return prices.dropna(how="all")
+
     # Pobieramy dane
     data = yf.download(
         tickers,
@@ -28,4 +64,7 @@ def get_prices(tickers, start_date, end_date=None):
     # Usuwamy dni bez notowań (np. weekendy)
     prices = prices.dropna(how="all")
 
+    if cache_dir and isinstance(prices, pd.DataFrame) and not prices.empty:
+        _write_cache(cache_dir, prices)
+
     return prices
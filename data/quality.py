@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+POLICIES = {"complete", "pairwise", "proxy"}
+
+
+def _easter(years):
+    """Data Wielkanocy (algorytm gregoriański Meeusa/Jonesa/Butchera) dla tablicy lat."""
+    y = np.asarray(years, dtype=int)
+    a, b, c = y % 19, y // 100, y % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return pd.to_datetime(pd.DataFrame({"year": y, "month": month, "day": day}))
+
+
+def gpw_holidays(years):
+    """
+    Dni bez sesji na GPW (poza weekendami): święta stałe, Wigilia, Sylwester
+    oraz święta ruchome liczone od Wielkanocy (Wielki Piątek, Poniedziałek Wielkanocny, Boże Ciało).
+    """
+    years = np.asarray(list(years), dtype=int)
+    fixed = ["01-01", "05-01", "05-03", "08-15", "11-01", "11-11", "12-24", "12-25", "12-26", "12-31"]
+    days = [pd.Timestamp(f"{y}-{md}") for y in years for md in fixed]
+    days += [pd.Timestamp(f"{y}-01-06") for y in years if y >= 2011]  # Trzech Króli od 2011
+
+    easter = _easter(years)
+    for offset in (-2, 1, 60):  # Wielki Piątek, Poniedziałek Wielkanocny, Boże Ciało
+        days += list(easter + pd.Timedelta(days=offset))
+    return pd.DatetimeIndex(sorted(set(days)))
+
+
+def gpw_calendar(start, end):
+    """Sesje GPW między start i end (dni robocze bez świąt giełdowych)."""
+    days = pd.bdate_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize())
+    holidays = gpw_holidays(range(days[0].year, days[-1].year + 1)) if len(days) else pd.DatetimeIndex([])
+    return days.difference(holidays)
+
+
+def _gap_masks(values: np.ndarray):
+    """
+    Klasyfikacja braków w macierzy cen (sesje x spółki), w pełni wektorowo:
+    - pre:  przed pierwszym notowaniem (luka debiutu),
+    - post: po ostatnim notowaniu (wycofanie / koniec danych),
+    - inner: luki wewnętrzne (zawieszenia, brak notowań) z długością luki run_len
+    oraz indeks ostatniego notowania przed każdą komórką (prev_idx).
+    """
+    T = values.shape[0]
+    valid = ~np.isnan(values)
+    t = np.arange(T)[:, None]
+
+    prev_idx = np.maximum.accumulate(np.where(valid, t, -1), axis=0)
+    next_idx = np.minimum.accumulate(np.where(valid, t, T)[::-1], axis=0)[::-1]
+
+    missing = ~valid
+    pre = missing & (prev_idx < 0)
+    post = missing & (next_idx >= T)
+    inner = missing & ~pre & ~post
+    run_len = np.where(inner, next_idx - prev_idx - 1, 0)
+    return pre, post, inner, run_len, prev_idx
+
+
+def prepare_prices(prices: pd.DataFrame, calendar: str = "gpw", ffill_limit: int = 5, policy: str = "pairwise"):
+    """
+    Etap jakości danych przed liczeniem zwrotów:
+    1. wyrównanie do kalendarza sesji GPW (dni spoza kalendarza i sesje bez żadnego notowania są usuwane),
+    2. luki wewnętrzne do ffill_limit sesji uzupełniane ostatnią ceną (brak transakcji),
+       dłuższe traktowane jako zawieszenia i zostawiane jako NaN,
+    3. policy = "proxy": okres przed debiutem odtwarzany wstecz średnim log-zwrotem pozostałych spółek.
+
+    Polityka decyduje też o dalszych obliczeniach (zob. main.py):
+    "complete" - tylko pełne wiersze zwrotów (jak dotąd), "pairwise" i "proxy" - wiersze
+    z brakami zostają, a kowariancja liczona jest z par dostępnych obserwacji.
+
+    Zwraca (ceny po czyszczeniu, raport pokrycia per ticker, maska cen odtworzonych proxy).
+    Ceny proxy służą tylko do estymacji kowariancji i wag - przy symulacji zwrotów (backtest,
+    przekroczenia VaR) komórki z maski trzeba pominąć, bo spółka nie była wtedy notowana.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Nieznana polityka braków: {policy} (dozwolone: {sorted(POLICIES)})")
+
+    px = prices.sort_index()
+    px = px[~px.index.duplicated(keep="last")]
+
+    if calendar == "gpw" and len(px):
+        cal = gpw_calendar(px.index[0], px.index[-1])
+        px.index = px.index.normalize()
+        px = px.reindex(cal)
+    px = px.dropna(how="all")
+    if px.empty:
+        raise ValueError("Brak danych cenowych po wyrównaniu do kalendarza.")
+
+    values = px.to_numpy(dtype=float)
+    pre, post, inner, run_len, prev_idx = _gap_masks(values)
+
+    # Krótkie luki -> ostatnia cena
+    short = inner & (run_len <= int(ffill_limit))
+    last_price = np.take_along_axis(values, np.clip(prev_idx, 0, None), axis=0)
+    out = np.where(short, last_price, values)
+
+    # Proxy przed debiutem: P_t = P_first * exp(-(C_first - C_t)), C = skumulowany średni log-zwrot rynku
+    proxied = np.zeros_like(pre)
+    if policy == "proxy" and pre.any():
+        with np.errstate(invalid="ignore", divide="ignore"):
+            log_rets = np.diff(np.log(out), axis=0)
+        counts = np.sum(~np.isnan(log_rets), axis=1)
+        mkt = np.where(counts > 0, np.nansum(log_rets, axis=1) / np.maximum(counts, 1), 0.0)
+        cum = np.concatenate(([0.0], np.cumsum(mkt)))
+
+        first = np.argmax(~np.isnan(values), axis=0)
+        listed = ~np.isnan(values).all(axis=0)
+        p_first = values[first, np.arange(values.shape[1])]
+        synthetic = p_first[None, :] * np.exp(cum[:, None] - cum[first][None, :])
+        proxied = pre & listed[None, :]
+        out = np.where(proxied, synthetic, out)
+
+    clean = pd.DataFrame(out, index=px.index, columns=px.columns)
+
+    # Raport pokrycia
+    valid = ~np.isnan(values)
+    n_sessions = len(px)
+    any_valid = valid.any(axis=0)
+    dates = px.index.to_numpy()
+    first_date = np.where(any_valid, dates[valid.argmax(axis=0)], np.datetime64("NaT"))
+    last_date = np.where(any_valid, dates[n_sessions - 1 - valid[::-1].argmax(axis=0)], np.datetime64("NaT"))
+    suspended = inner & ~short
+
+    coverage = pd.DataFrame({
+        "Pierwsze notowanie": first_date,
+        "Ostatnie notowanie": last_date,
+        "Sesje z notowaniem": valid.sum(axis=0),
+        "Pokrycie kalendarza": valid.sum(axis=0) / n_sessions,
+        "Przed debiutem (sesje)": pre.sum(axis=0),
+        "Po ostatnim notowaniu (sesje)": post.sum(axis=0),
+        "Luki uzupełnione ffill (sesje)": short.sum(axis=0),
+        "Zawieszenia (sesje)": suspended.sum(axis=0),
+        "Najdłuższa luka (sesje)": run_len.max(axis=0),
+        "Uzupełnione proxy (sesje)": proxied.sum(axis=0),
+        "Pokrycie po czyszczeniu": (~np.isnan(out)).sum(axis=0) / n_sessions,
+    }, index=px.columns)
+    coverage.index.name = "Ticker"
+
+    return clean, coverage, pd.DataFrame(proxied, index=px.index, columns=px.columns)
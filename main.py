@@ -6,14 +6,21 @@ import yaml
 import numpy as np
 import pandas as pd
 
-from analytics.risk_metrics import compute_empirical_risk
+from analytics.risk_metrics import compute_empirical_risk, compute_parametric_var
 from analytics.risk_utils import returns
+from analytics.backtest import walk_forward_backtest
+from analytics.var_backtest import backtest_var
+from analytics.stress import run_stress_tests
 from data.portfolio_loader import load_trades, build_holdings
 from data.prices import get_prices
+from data.groups_loader import load_group_map
+from data.quality import prepare_prices
 from data.valuation_loader import load_valuation_sheet, load_tickers_from_valuation
 from optimization.risk_parity import shrink_cov, risk_parity_weights
-from optimization.black_litterman import bl_minimal
+from optimization.factor_model import pca_factor_model, cov_scale
+from optimization.black_litterman import bl_minimal, build_views, view_omega
 from optimization.constraints import project_boxed_simplex
+from optimization.rebalance import rebalance_orders, trades_table, rebalance_summary
 from reporting.exporter import export_report_xlsx
 
 
@@ -69,13 +76,24 @@ def main():
     valuation_path = cfg.get("valuation_excel_path", "input/portfolio2.xlsx")
     trades_path = cfg.get("trades_excel_path", "input/portfolio.xlsx")
     output_path = cfg.get("output_file", "output/portfolio_risk_report.xlsx")
+    price_cache_dir = cfg.get("price_cache_dir")
+    offline = bool(cfg.get("offline", False))
+    stress_groups_path = cfg.get("stress_groups_path")
 
     # PARAMETRY
+    calendar = cfg.get("calendar")
+    ffill_limit = int(cfg.get("ffill_limit", 0))
+    missing_policy = str(cfg.get("missing_policy", "complete"))
+    cov_model = str(cfg.get("cov_model", "sample"))
+    factor_count = int(cfg.get("factor_count", 5))
+    factor_market_ticker = cfg.get("factor_market_ticker")
+    rp_method = str(cfg.get("rp_method", "slsqp"))
     var_conf = float(cfg.get("var_confidence", 0.99))
     var_h = int(cfg.get("var_horizon_days", 20))
     use_log = bool(cfg.get("use_log_returns", True))
     risk_window_days = int(cfg.get("risk_window_days", 252))
     trading_days = int(cfg.get("trading_days", 252))
+    var_backtest_window_days = int(cfg.get("var_backtest_window_days", risk_window_days))
     w_max = float(cfg.get("w_max", 0.20))
     bl_tau = float(cfg.get("bl_tau", 0.05))
     bl_delta = float(cfg.get("bl_delta", 2.5))
@@ -85,6 +103,20 @@ def main():
     raw_min_upside = cfg.get("min_upside", None)
     min_tickers_after_filter = int(cfg.get("min_tickers_after_filter", 9))
     r_f = float(cfg.get("risk_free_rate", 0.0))
+    rebalance_target = str(cfg.get("rebalance_target", "BL_Box"))
+    rebalance_cost_bps = float(cfg.get("rebalance_cost_bps", 10.0))
+    rebalance_min_ticket = float(cfg.get("rebalance_min_ticket", 0.0))
+    rebalance_lot_size = int(cfg.get("rebalance_lot_size", 1))
+    backtest_enabled = bool(cfg.get("backtest_enabled", False))
+    backtest_freq = str(cfg.get("backtest_freq", "M"))
+    backtest_window_days = int(cfg.get("backtest_window_days", 252))
+    backtest_cost_bps = float(cfg.get("backtest_cost_bps", 10.0))
+    backtest_workers = cfg.get("backtest_workers")
+    stress_enabled = bool(cfg.get("stress_enabled", False))
+    stress_history_start = cfg.get("stress_history_start", "2007-01-01")
+    stress_rolling_horizon_days = int(cfg.get("stress_rolling_horizon_days", 20))
+    stress_windows = cfg.get("stress_windows")
+    stress_shocks = cfg.get("stress_shocks") or {}
 
     # DATY
     start_date = cfg.get("start_date") or (datetime.today().date() - timedelta(days=730))
@@ -121,7 +153,8 @@ def main():
 
     # CENY
     print(f"Pobieram ceny dla {len(tickers)} spółek od {start_date} do {end_date}.")
-    prices = get_prices(tickers, start_date=start_date, end_date=end_date)
+    prices = get_prices(tickers, start_date=start_date, end_date=end_date,
+                        cache_dir=price_cache_dir, offline=offline)
     if prices is None or prices.empty:
         print("[ERROR] Brak danych cenowych.", file=sys.stderr)
         sys.exit(3)
@@ -129,6 +162,14 @@ def main():
     # Synchronizujemy holdings z cenami
     prices = prices.reindex(columns=tickers)
 
+    # JAKOŚĆ DANYCH
+    prices, coverage, proxied = prepare_prices(prices, calendar=calendar, ffill_limit=ffill_limit, policy=missing_policy)
+    rets_how = "any" if missing_policy == "complete" else "all"
+    pairwise = missing_policy != "complete"
+
+    # Pełne pozycje (także spółki odrzucone filtrem) - do zleceń sprzedaży w rebalancingu
+    holdings_all = holdings[holdings != 0] if holdings is not None else pd.Series(dtype=float)
+
     if holdings is None or holdings.empty:
         holdings = pd.Series(0.0, index=prices.columns, name="qty")
     else:
@@ -144,20 +185,59 @@ def main():
         risk_window_days=risk_window_days,
         use_log_returns=use_log,
         confidence=var_conf,
+        dropna_how=rets_how,
     )
 
+    # WALIDACJA VaR
+    var_backtest = None
+    try:
+        var_backtest = backtest_var(
+            prices=prices,
+            holdings=holdings,
+            window_days=var_backtest_window_days,
+            use_log_returns=use_log,
+            confidence=var_conf,
+            dropna_how=rets_how,
+            proxied=proxied,
+        )
+    except Exception as e:
+        print(f"[WARN] Pominięto walidację VaR: {e}", file=sys.stderr)
+
     # RISK PARITY
-    rets_log = returns(prices, log=True)
-    Sigma = shrink_cov(rets_log)
-    w_rp = risk_parity_weights(Sigma, w_min=0.0, w_max=w_max)
+    rets_log = returns(prices, log=True, how=rets_how)
+    if cov_model == "factor":
+        market = None
+        if factor_market_ticker:
+            try:
+                mkt_px = get_prices([factor_market_ticker], start_date=start_date, end_date=end_date,
+                                    cache_dir=price_cache_dir, offline=offline)
+                mkt_px.index = pd.DatetimeIndex(mkt_px.index).normalize()
+                mkt_px = mkt_px[~mkt_px.index.duplicated(keep="last")].reindex(prices.index)  # Kalendarz po czyszczeniu
+                market = returns(mkt_px, log=True, how="all").iloc[:, 0]
+            except Exception as e:
+                print(f"[WARN] Brak cen indeksu {factor_market_ticker}, sam PCA: {e}", file=sys.stderr)
+        Sigma = pca_factor_model(rets_log, k=factor_count, market=market)
+        if market is not None and not Sigma["market"]:
+            print(f"[WARN] Za mało wspólnych notowań indeksu {factor_market_ticker}, pominięto czynnik rynkowy.",
+                  file=sys.stderr)
+    else:
+        Sigma = shrink_cov(rets_log, pairwise=pairwise)
+    w_rp = risk_parity_weights(Sigma, w_min=0.0, w_max=w_max, method=rp_method)
+
+    # VaR PARAMETRYCZNY (z tej samej kowariancji)
+    risk_param = compute_parametric_var(
+        Sigma=Sigma, weights=risk_emp["weights"], nav=risk_emp["nav"],
+        horizon_days=var_h, confidence=var_conf,
+    )
 
     # BLACK–LITTERMAN
-    Sigma_ann = Sigma * trading_days
+    Sigma_ann = cov_scale(Sigma, trading_days)
     w_mkt = np.maximum(w_rp, 0)
     w_mkt = w_mkt / w_mkt.sum()
 
     bl_weights = None
     bl_weights_box = None
+    bl_views = None
 
     if valuation_path and Path(valuation_path).exists():
         try:
@@ -165,19 +245,9 @@ def main():
             val = val[val["Ticker"].isin(prices.columns)].copy()
             required = {"Ticker", "Views", "Confidence"}
             if not val.empty and required.issubset(val.columns):
-                idx_map = {t: i for i, t in enumerate(prices.columns)}
-                pick_idx = [idx_map[t] for t in val["Ticker"]]
-                k, n = len(pick_idx), len(prices.columns)
-                P = np.zeros((k, n))
-                for r, j in enumerate(pick_idx):
-                    P[r, j] = 1.0
-
-                Q = val["Views"].astype(float).to_numpy() - r_f # Odejmujemy stopę wolną od ryzyka
-
-                conf = val["Confidence"].astype(float).clip(1e-6, 1.0).to_numpy()
-                base = np.diag(P @ (bl_tau * Sigma_ann) @ P.T)
-                base = np.clip(base, 1e-12, None)
-                Omega = np.diag(base / (conf ** 2)) * float(bl_omega_scale)
+                P, Q, conf = build_views(val, list(prices.columns), r_f=r_f)
+                bl_views = (P, Q, conf)
+                Omega = view_omega(P, Sigma_ann, bl_tau, conf, bl_omega_scale)
 
                 bl_out = bl_minimal(
                     Sigma=Sigma_ann, w_mkt=w_mkt, delta=bl_delta, tau=bl_tau,
@@ -193,6 +263,85 @@ def main():
         except Exception as e:
             print(f"[WARN] Pominięto Black–Litterman: {e}", file=sys.stderr)
 
+    # REBALANCING
+    trades = None
+    trades_summary = None
+    try:
+        candidates = {"RP": w_rp, "BL": bl_weights, "BL_Box": bl_weights_box}
+        targets = pd.DataFrame({k: v for k, v in candidates.items() if v is not None}).T
+        last_prices = prices.ffill().iloc[-1].dropna()
+
+        # Pozycje spoza uniwersum (np. odrzucone filtrem min_upside) mają cel 0 -> zlecenia sprzedaży
+        outside = [t for t in holdings_all.index if t not in prices.columns]
+        if outside:
+            try:
+                out_px = get_prices(outside, start_date=start_date, end_date=end_date,
+                                    cache_dir=price_cache_dir, offline=offline)
+                last_prices = pd.concat([last_prices, out_px.ffill().iloc[-1].dropna()])
+            except Exception as e:
+                print(f"[WARN] Brak cen pozycji spoza uniwersum {outside}: {e}", file=sys.stderr)
+            missing = [t for t in outside if t not in last_prices.index]
+            if missing:
+                print(f"[WARN] Pozycje bez ceny pominięte w zleceniach: {', '.join(missing)}", file=sys.stderr)
+        qty_all = holdings_all.reindex(last_prices.index).fillna(0.0)
+
+        rebal = rebalance_orders(
+            qty=qty_all, last_prices=last_prices, cash=float(cash_balance), targets=targets,
+            Sigma=Sigma_ann, cost_bps=rebalance_cost_bps, min_ticket=rebalance_min_ticket,
+            lot_size=rebalance_lot_size, upper={"RP": w_max, "BL_Box": bl_box_ub},
+        )
+        post_risk = {
+            k: compute_empirical_risk(
+                prices=prices, holdings=rebal["post_qty"].loc[k], horizon_days=var_h,
+                trading_days=trading_days, risk_window_days=risk_window_days,
+                use_log_returns=use_log, confidence=var_conf, dropna_how=rets_how,
+            )
+            for k in targets.index
+        }
+        trades_summary = rebalance_summary(rebal, post_risk)
+
+        target = rebalance_target if rebalance_target in targets.index else "RP"
+        trades = trades_table(rebal, target, qty_all, last_prices, cost_bps=rebalance_cost_bps)
+    except Exception as e:
+        print(f"[WARN] Pominięto generowanie zleceń: {e}", file=sys.stderr)
+
+    # BACKTEST
+    backtest = None
+    if backtest_enabled:
+        try:
+            backtest = walk_forward_backtest(
+                prices=prices, freq=backtest_freq, window_days=backtest_window_days,
+                cost_bps=backtest_cost_bps, trading_days=trading_days, w_max=w_max,
+                views=bl_views, bl_tau=bl_tau, bl_delta=bl_delta, bl_omega_scale=bl_omega_scale,
+                bl_box_lb=bl_box_lb, bl_box_ub=bl_box_ub, confidence=var_conf,
+                workers=int(backtest_workers) if backtest_workers else None,
+                dropna_how=rets_how, pairwise=pairwise, proxied=proxied,
+            )
+        except Exception as e:
+            print(f"[WARN] Pominięto backtest: {e}", file=sys.stderr)
+
+    # STRESS TESTY
+    stress = None
+    if stress_enabled:
+        try:
+            history = get_prices(tickers, start_date=stress_history_start, end_date=end_date,
+                                 cache_dir=price_cache_dir, offline=offline)
+            groups = None
+            if stress_groups_path and Path(stress_groups_path).exists():
+                groups = load_group_map(stress_groups_path)
+            windows = {k: tuple(v) for k, v in stress_windows.items()} if stress_windows else None
+            stress = run_stress_tests(
+                prices=prices,
+                holdings=holdings,
+                history=history,
+                windows=windows,
+                shocks=stress_shocks,
+                groups=groups,
+                rolling_horizon_days=stress_rolling_horizon_days,
+            )
+        except Exception as e:
+            print(f"[WARN] Pominięto stress testy: {e}", file=sys.stderr)
+
     # EKSPORT
     export_report_xlsx(
         output_path=output_path,
@@ -200,6 +349,7 @@ def main():
         start_date=str(start_date),
         end_date=str(end_date),
         risk_emp=risk_emp,
+        risk_param=risk_param,
         cash_balance=float(cash_balance),
         var_conf=var_conf,
         var_h=var_h,
@@ -208,6 +358,12 @@ def main():
         w_rp=pd.Series(w_rp, index=prices.columns),
         bl_weights=bl_weights,
         bl_weights_box=bl_weights_box,
+        backtest=backtest,
+        var_backtest=var_backtest,
+        stress=stress,
+        trades=trades,
+        trades_summary=trades_summary,
+        coverage=coverage,
         use_log=use_log,
         risk_window_days=risk_window_days,
         trading_days=trading_days,
@@ -217,6 +373,13 @@ def main():
         bl_omega_scale=bl_omega_scale,
         bl_box_lb=bl_box_lb,
         bl_box_ub=bl_box_ub,
+        calendar=calendar,
+        ffill_limit=ffill_limit,
+        missing_policy=missing_policy,
+        cov_model=cov_model,
+        factor_count=factor_count,
+        factor_market_ticker=factor_market_ticker,
+        rp_method=rp_method,
         n_tickers=len(prices.columns),
     )
 
@@ -1,5 +1,6 @@
 import numpy as np
 from pypfopt.black_litterman import BlackLittermanModel
+from .factor_model import is_factor_model, cov_matvec, cov_quad_diag, factor_solve
 
 def bl_minimal(Sigma, w_mkt, delta, tau=0.05, P=None, Q=None, Omega=None, omega_scale=1.0):
     """
@@ -16,8 +17,13 @@ def bl_minimal(Sigma, w_mkt, delta, tau=0.05, P=None, Q=None, Omega=None, omega_
     - Gdy P i Q są None (brak poglądów), BL redukuje się do priory („rynkowych”) i wagi w_bl
       wyjdą równe w_mkt (bo pi = delta * Sigma @ w_mkt => w = (1/delta) * Sigma^{-1} pi = w_mkt).
     - Wagi w_bl nie są ograniczane (mogą wyjść spoza [0,1] i nie sumować się do 1) — to czysty MV.
+    - Sigma może być modelem czynnikowym (factor_model.pca_factor_model) - wtedy liczymy bez
+      PyPortfolioOpt i bez odwracania pełnej macierzy (zob. _bl_factor).
     """
 
+    if is_factor_model(Sigma):
+        return _bl_factor(Sigma, w_mkt, delta, tau, P, Q, Omega)
+
     # Przygotowanie macierzy kowariancji
     Sigma = np.asarray(Sigma, dtype=float)
     w_mkt = np.asarray(w_mkt, dtype=float).reshape(-1)
@@ -50,4 +56,63 @@ def bl_minimal(Sigma, w_mkt, delta, tau=0.05, P=None, Q=None, Omega=None, omega_
     inv_Sigma = np.linalg.inv(Sigma)
     w_bl = (1.0 / delta) * (inv_Sigma @ mu_bl) # Klasyczny Markowitz
 
-    return {'pi': pi, 'mu_bl': mu_bl, 'w_bl': w_bl, 'Omega': Omega}
\ No newline at end of file
+    return {'pi': pi, 'mu_bl': mu_bl, 'w_bl': w_bl, 'Omega': Omega}
+
+
+def _bl_factor(Sigma, w_mkt, delta, tau, P, Q, Omega):
+    """
+    BL dla Σ = B F Bᵀ + D bez odwracania macierzy n x n (ten sam wzór co PyPortfolioOpt):
+        mu_bl = pi + τ Σ Pᵀ (τ P Σ Pᵀ + Ω)⁻¹ (Q - P pi),   w_bl = (1/δ) Σ⁻¹ mu_bl.
+
+    Gdy każda spółka ma co najwyżej jeden pogląd, a Ω jest diagonalna (jak w main.py),
+    τ P Σ Pᵀ + Ω to znów model czynnikowy i rozwiązujemy go wzorem Woodbury'ego.
+    """
+    w_mkt = np.asarray(w_mkt, dtype=float).reshape(-1)
+    P = np.asarray(P, dtype=float)
+    Q = np.asarray(Q, dtype=float).reshape(-1)
+    Omega = np.asarray(Omega, dtype=float)
+
+    pi = delta * cov_matvec(Sigma, w_mkt)
+    rhs = Q - P @ pi
+
+    PB = P @ Sigma["B"]
+    one_view_per_asset = np.all(np.count_nonzero(P, axis=0) <= 1)
+    omega_diag = np.allclose(Omega, np.diag(np.diag(Omega)))
+    if one_view_per_asset and omega_diag:
+        views_cov = {"B": PB, "F": tau * Sigma["F"], "D": tau * (P ** 2) @ Sigma["D"] + np.diag(Omega)}
+        z = factor_solve(views_cov, rhs)
+    else:
+        A = tau * (PB @ Sigma["F"] @ PB.T + (P * Sigma["D"]) @ P.T) + Omega
+        z = np.linalg.solve(A, rhs)
+
+    mu_bl = pi + tau * cov_matvec(Sigma, P.T @ z)
+    w_bl = (1.0 / delta) * factor_solve(Sigma, mu_bl) # Klasyczny Markowitz (Woodbury)
+
+    return {'pi': pi, 'mu_bl': mu_bl, 'w_bl': w_bl, 'Omega': Omega}
+
+
+def build_views(val, tickers, r_f=0.0):
+    """
+    Z arkusza wyceny (Ticker, Views, Confidence) buduje poglądy absolutne:
+    - P: macierz wyboru (jeden wiersz = jedna spółka z wyceną),
+    - Q: oczekiwany upside pomniejszony o stopę wolną od ryzyka,
+    - conf: pewność poglądu (do skalowania Omega).
+    """
+    idx_map = {t: i for i, t in enumerate(tickers)}
+    pick_idx = [idx_map[t] for t in val["Ticker"]]
+    k, n = len(pick_idx), len(tickers)
+    P = np.zeros((k, n))
+    for r, j in enumerate(pick_idx):
+        P[r, j] = 1.0
+
+    Q = val["Views"].astype(float).to_numpy() - r_f # Odejmujemy stopę wolną od ryzyka
+
+    conf = val["Confidence"].astype(float).clip(1e-6, 1.0).to_numpy()
+    return P, Q, conf
+
+
+def view_omega(P, Sigma_ann, tau, conf, omega_scale=1.0):
+    """Omega = diag(P (tau Σ) Pᵀ) / conf² — im mniejsza pewność, tym większa niepewność poglądu."""
+    base = tau * cov_quad_diag(Sigma_ann, P)
+    base = np.clip(base, 1e-12, None)
+    return np.diag(base / (conf ** 2)) * float(omega_scale)
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+# Model czynnikowy kowariancji: Σ = B F Bᵀ + diag(D)
+# Reprezentacja: słownik {"B": n x k, "F": k x k, "D": n, "index": tickery}.
+# Funkcje cov_* poniżej przyjmują zarówno taki model, jak i zwykłą macierz (DataFrame / ndarray).
+
+
+def pca_factor_model(returns: pd.DataFrame, k: int = 5, market: pd.Series = None, eps=1e-8,
+                     min_market_obs: int = 20):
+    """
+    Statystyczny model czynnikowy z PCA na (scentrowanych) zwrotach.
+
+    - k czynników: k pierwszych składowych głównych (losowe SVD, zob. _top_svd),
+    - market: opcjonalne zwroty indeksu (np. WIG) - wtedy pierwszy czynnik to rynek (beta z regresji),
+      a PCA liczone jest na resztach (pozostałe k-1 czynników),
+    - D: wariancja specyficzna = wariancja zwrotu - część wyjaśniona przez czynniki (min. eps).
+
+    Gdy zwroty indeksu pokrywają się ze zwrotami spółek w mniej niż min_market_obs dniach
+    (albo są stałe), czynnik rynkowy jest pomijany - wynik ma wtedy "market": False.
+
+    Braki danych (NaN) traktowane są jak zwrot równy średniej - model działa też na niepełnym panelu.
+    """
+    rs = returns.apply(pd.to_numeric, errors="coerce").dropna(how="all")
+    X = rs.to_numpy(dtype=float)
+    T, n = X.shape
+    observed = ~np.isnan(X)
+    Xc = np.where(observed, X - np.nanmean(X, axis=0), 0.0)
+    var = np.nanvar(X, axis=0, ddof=1)
+
+    parts = []
+    use_market = False
+    if market is not None:
+        m = market.reindex(rs.index).to_numpy(dtype=float)
+        if np.isfinite(m).sum() >= max(int(min_market_obs), 2):
+            mc = np.nan_to_num(m - np.nanmean(m))
+            use_market = mc @ mc > 0
+    if use_market:
+        beta = Xc.T @ mc / (mc @ mc)
+        Xc = Xc - np.outer(mc, beta) * observed  # Reszty po usunięciu rynku
+        parts.append(beta[:, None] * np.sqrt(mc @ mc / (T - 1)))
+        k -= 1
+
+    k = int(min(max(k, 0), min(T, n)))
+    if k > 0:
+        s, Vt = _top_svd(Xc, k)
+        parts.append(Vt.T * (s / np.sqrt(T - 1)))
+
+    B = np.hstack(parts) if parts else np.zeros((n, 0))
+    D = np.clip(var - np.sum(B ** 2, axis=1), eps, None)
+    return {"B": B, "F": np.eye(B.shape[1]), "D": D, "index": rs.columns, "market": bool(use_market)}
+
+
+def _top_svd(X, k, oversample=10, power_iter=4, seed=0):
+    """
+    k największych wartości szczególnych i wektorów prawych X (T x n) losowym SVD
+    (Halko, Martinsson, Tropp): rzut na k + oversample losowych kierunków i kilka iteracji
+    potęgowych, koszt O(T·n·k) zamiast O(T·n·min(T, n)) dla pełnego SVD.
+    """
+    T, n = X.shape
+    m = min(k + oversample, T, n)
+    if m >= min(T, n):
+        _, s, Vt = np.linalg.svd(X, full_matrices=False)
+        return s[:k], Vt[:k]
+
+    rng = np.random.default_rng(seed)
+    Y = X @ rng.standard_normal((n, m))
+    for _ in range(power_iter):
+        Y, _ = np.linalg.qr(Y)
+        Y, _ = np.linalg.qr(X.T @ Y)
+        Y = X @ Y
+    Qy, _ = np.linalg.qr(Y)
+    _, s, Vt = np.linalg.svd(Qy.T @ X, full_matrices=False)
+    return s[:k], Vt[:k]
+
+
+def is_factor_model(Sigma):
+    return isinstance(Sigma, dict) and "B" in Sigma
+
+
+def cov_index(Sigma):
+    """Tickery (kolejność wierszy/kolumn) macierzy lub modelu czynnikowego."""
+    return Sigma["index"] if is_factor_model(Sigma) else Sigma.index
+
+
+def cov_matvec(Sigma, x):
+    """Σ x dla wektora (n) lub macierzy (n x K); dla modelu czynnikowego koszt O(n·k) zamiast O(n²)."""
+    x = np.asarray(x, dtype=float)
+    if not is_factor_model(Sigma):
+        return np.asarray(Sigma, dtype=float) @ x
+    B, F, D = Sigma["B"], Sigma["F"], Sigma["D"]
+    return B @ (F @ (B.T @ x)) + (D * x.T).T
+
+
+def cov_diag(Sigma):
+    """Przekątna Σ (wariancje)."""
+    if not is_factor_model(Sigma):
+        return np.diag(np.asarray(Sigma, dtype=float)).copy()
+    B, F, D = Sigma["B"], Sigma["F"], Sigma["D"]
+    return np.sum((B @ F) * B, axis=1) + D
+
+
+def cov_quad_diag(Sigma, P):
+    """Przekątna P Σ Pᵀ (np. wariancje portfeli poglądów w BL) bez budowania Σ."""
+    P = np.asarray(P, dtype=float)
+    if not is_factor_model(Sigma):
+        return np.sum((P @ np.asarray(Sigma, dtype=float)) * P, axis=1)
+    PB = P @ Sigma["B"]
+    return np.sum((PB @ Sigma["F"]) * PB, axis=1) + (P ** 2) @ Sigma["D"]
+
+
+def cov_scale(Sigma, c):
+    """c · Σ (np. annualizacja kowariancji dziennej)."""
+    if not is_factor_model(Sigma):
+        return Sigma * c
+    return {**Sigma, "F": Sigma["F"] * c, "D": Sigma["D"] * c}
+
+
+def cov_subset(Sigma, tickers):
+    """Σ ograniczona / rozszerzona do podanych tickerów (brakujące = zerowe wiersze)."""
+    if not is_factor_model(Sigma):
+        return pd.DataFrame(Sigma).reindex(index=tickers, columns=tickers).fillna(0.0)
+    pos = pd.Index(Sigma["index"]).get_indexer(tickers)
+    known = pos >= 0
+    B = np.zeros((len(tickers), Sigma["B"].shape[1]))
+    D = np.zeros(len(tickers))
+    B[known], D[known] = Sigma["B"][pos[known]], Sigma["D"][pos[known]]
+    return {"B": B, "F": Sigma["F"], "D": D, "index": pd.Index(tickers)}
+
+
+def factor_to_dense(Sigma):
+    """Pełna macierz B F Bᵀ + diag(D) jako DataFrame (do raportów i porównań)."""
+    B, F, D = Sigma["B"], Sigma["F"], Sigma["D"]
+    S = B @ F @ B.T
+    S[np.diag_indices_from(S)] += D
+    return pd.DataFrame(S, index=Sigma["index"], columns=Sigma["index"])
+
+
+def factor_solve(Sigma, y):
+    """
+    Σ⁻¹ y ze wzoru Woodbury'ego:
+        (B F Bᵀ + D)⁻¹ = D⁻¹ - D⁻¹ B (F⁻¹ + Bᵀ D⁻¹ B)⁻¹ Bᵀ D⁻¹
+    Odwracamy tylko macierz k x k, koszt O(n·k²) zamiast O(n³).
+    """
+    y = np.asarray(y, dtype=float)
+    B, F, D = Sigma["B"], Sigma["F"], Sigma["D"]
+    Dinv_y = (y.T / D).T
+    if B.shape[1] == 0:
+        return Dinv_y
+    Dinv_B = B / D[:, None]
+    M = np.linalg.inv(F) + B.T @ Dinv_B
+    return Dinv_y - Dinv_B @ np.linalg.solve(M, B.T @ Dinv_y)
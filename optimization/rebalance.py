@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+from .factor_model import cov_subset, cov_diag, cov_matvec
+
+
+def _cash_after(d, p, cash, cost_rate):
+    """Gotówka po transakcjach: kupno zmniejsza, sprzedaż zwiększa, koszt od wartości obrotu."""
+    flow = d * p
+    return cash - flow.sum(axis=1) - cost_rate * np.abs(flow).sum(axis=1)
+
+
+def rebalance_orders(
+    qty: pd.Series,
+    last_prices: pd.Series,
+    cash: float,
+    targets,
+    Sigma,
+    cost_bps: float = 10.0,
+    min_ticket: float = 0.0,
+    lot_size: int = 1,
+    max_iter: int = None,
+    upper=None,
+):
+    """
+    Zamienia wagi docelowe na zlecenia w całkowitej liczbie akcji (wielokrotności lot_size).
+
+    targets - Series (jeden cel) albo DataFrame K x n (wiele celów naraz, wiersz = cel),
+    Sigma   - kowariancja (n x n lub model czynnikowy) do błędu odwzorowania (tracking error),
+    upper   - górne ograniczenie wag celu: liczba, słownik {cel: liczba} albo DataFrame jak targets
+              (None = bez ograniczenia); dokupowanie lotów nie przekracza go.
+
+    Kroki (wektorowo dla wszystkich celów):
+    1. zaokrąglenie w dół idealnej liczby akcji (cel * majątek po kosztach / cena),
+    2. zlecenia poniżej min_ticket (PLN) są pomijane,
+    3. gdy brakuje gotówki - zmniejszamy zakupy najbardziej przeważonych spółek, a gdy to nie
+       wystarcza, sprzedajemy je (co najmniej min_ticket); jeśli i to nie pomaga - ValueError,
+    4. zachłannie dokupujemy loty, które najbardziej zmniejszają (w - cel)ᵀ Σ (w - cel),
+       dopóki starcza gotówki (z kosztami transakcyjnymi) i waga nie przekracza `upper`.
+    """
+    tickers = list(last_prices.index)
+    T = pd.DataFrame(targets).T if isinstance(targets, pd.Series) else pd.DataFrame(targets)
+    T = T.reindex(columns=tickers).fillna(0.0)
+
+    p = last_prices.to_numpy(dtype=float)
+    q0 = qty.reindex(tickers).fillna(0.0).to_numpy(dtype=float)
+    S = cov_subset(Sigma, tickers)
+    Tw = T.to_numpy(dtype=float)
+    K, n = Tw.shape
+    c = cost_bps / 1e4
+    lot = float(lot_size)
+    rows = np.arange(K)
+
+    wealth = float(q0 @ p + cash)
+    # Idealna (ułamkowa) liczba akcji - od majątku pomniejszonego o szacowane koszty przejścia do celu
+    net = wealth - c * np.abs(Tw * wealth - q0 * p).sum(axis=1)
+    ideal = Tw * net[:, None] / p
+
+    # 1-2. Zaokrąglenie w dół do lotów i próg minimalnego zlecenia
+    d = np.floor(ideal / lot) * lot - q0
+    d[(d != 0) & (np.abs(d) * p < min_ticket)] = 0.0
+    cash_after = _cash_after(d, p, cash, c)
+    min_lots = np.maximum(np.ceil(min_ticket / (p * lot)), 1.0) * lot
+
+    # 3. Naprawa ujemnej gotówki: redukcja zakupów najbardziej przeważonych spółek
+    for _ in range(n):
+        short = cash_after < -1e-9
+        if not short.any():
+            break
+        over = np.where(d > 0, (q0 + d - ideal) * p, -np.inf)
+        r = rows[short & np.isfinite(over).any(axis=1)]
+        if len(r) == 0:
+            break
+        j = over[r].argmax(axis=1)
+        need = np.ceil(-cash_after[r] / (p[j] * (1.0 + c)) / lot) * lot
+        d[r, j] -= np.minimum(need, d[r, j])
+        d[r, j] = np.where(d[r, j] * p[j] < min_ticket, 0.0, d[r, j])
+        cash_after = _cash_after(d, p, cash, c)
+
+    # 3b. Same redukcje zakupów nie wystarczą (np. ujemne saldo na starcie) - sprzedajemy
+    #     najbardziej przeważone pozycje, zlecenie co najmniej min_ticket, najwyżej cała pozycja
+    for _ in range(n):
+        short = cash_after < -1e-9
+        if not short.any():
+            break
+        held = q0 + d
+        over = np.where((held > 0) & (d <= 0), (held - ideal) * p, -np.inf)
+        r = rows[short & np.isfinite(over).any(axis=1)]
+        if len(r) == 0:
+            break
+        j = over[r].argmax(axis=1)
+        need = np.ceil(-cash_after[r] / (p[j] * (1.0 - c)) / lot) * lot
+        need = np.where(d[r, j] == 0, np.maximum(need, min_lots[j]), need)
+        d[r, j] -= np.minimum(need, held[r, j])
+        cash_after = _cash_after(d, p, cash, c)
+
+    if (cash_after < -1e-9).any():
+        bad = ", ".join(map(str, T.index[cash_after < -1e-9]))
+        raise ValueError(f"Nie da się pokryć ujemnej gotówki sprzedażą pozycji (cel: {bad}).")
+
+    # Górne ograniczenia wag celów (K x n)
+    if upper is None:
+        U = np.full((K, n), np.inf)
+    elif isinstance(upper, pd.DataFrame):
+        U = upper.reindex(index=T.index, columns=tickers).fillna(np.inf).to_numpy(dtype=float)
+    elif isinstance(upper, dict):
+        U = np.repeat(np.array([[upper.get(k, np.inf)] for k in T.index], dtype=float), n, axis=1)
+    else:
+        U = np.full((K, n), float(upper))
+
+    # 4. Zachłanne dokupowanie lotów zmniejszających tracking error
+    diag = cov_diag(S)
+    active = np.ones(K, dtype=bool)
+    for _ in range(max_iter or 10 * n):
+        if not active.any():
+            break
+        w = (q0 + d) * p / wealth
+        g = cov_matvec(S, (w - Tw).T).T
+        step = np.where(d == 0, min_lots, lot)
+        new_d = d + step
+        valid = (new_d == 0) | (np.abs(new_d) * p >= min_ticket)
+        cash_change = -step * p - c * p * (np.abs(new_d) - np.abs(d))
+        affordable = cash_after[:, None] + cash_change >= -1e-9
+
+        # Waga po dokupieniu liczona od majątku po kosztach (jak post_weights poniżej)
+        total = ((q0 + d) * p).sum(axis=1) + cash_after
+        new_total = total[:, None] - c * p * (np.abs(new_d) - np.abs(d))
+        capped = (q0 + new_d) * p / new_total <= U + 1e-12
+
+        delta = step * p / wealth
+        gain = 2.0 * g * delta + diag * delta ** 2  # Zmiana (w - cel)ᵀ Σ (w - cel)
+        gain = np.where(valid & affordable & capped, gain, np.inf)
+
+        j = gain.argmin(axis=1)
+        active &= gain[rows, j] < 0
+        r = rows[active]
+        d[r, j[r]] = new_d[r, j[r]]
+        cash_after[r] += cash_change[r, j[r]]
+
+    post_qty = q0 + d
+    post_values = post_qty * p
+    post_total = post_values.sum(axis=1) + cash_after
+    post_w = post_values / post_total[:, None]
+    diff = post_w - Tw
+
+    return {
+        "tickers": tickers,
+        "targets": T,
+        "orders": pd.DataFrame(d, index=T.index, columns=tickers),
+        "post_qty": pd.DataFrame(post_qty, index=T.index, columns=tickers),
+        "post_weights": pd.DataFrame(post_w, index=T.index, columns=tickers),
+        "cash_after": pd.Series(cash_after, index=T.index),
+        "costs": pd.Series(c * np.abs(d * p).sum(axis=1), index=T.index),
+        "tracking_error": pd.Series(np.sqrt(np.maximum(np.sum(diff * cov_matvec(S, diff.T).T, axis=1), 0.0)),
+                                    index=T.index),
+    }
+
+
+def trades_table(rebal: dict, target: str, qty: pd.Series, last_prices: pd.Series, cost_bps: float = 10.0):
+    """Tabela zleceń dla wybranego celu: BUY/SELL, liczba akcji, wartość, koszt i wagi po transakcjach."""
+    tickers = rebal["tickers"]
+    d = rebal["orders"].loc[target]
+    p = last_prices.reindex(tickers)
+    value = (d * p).abs()
+
+    df = pd.DataFrame({
+        "Cena": p,
+        "Liczba akcji (teraz)": qty.reindex(tickers).fillna(0.0),
+        "Waga docelowa (%)": rebal["targets"].loc[target] * 100.0,
+        "Zlecenie": np.where(d > 0, "BUY", np.where(d < 0, "SELL", "")),
+        "Liczba akcji": d.abs(),
+        "Wartość zlecenia (PLN)": value,
+        "Koszt (PLN)": value * cost_bps / 1e4,
+        "Liczba akcji (po)": rebal["post_qty"].loc[target],
+        "Waga po (%)": rebal["post_weights"].loc[target] * 100.0,
+    })
+    df.index.name = "Ticker"
+    return df
+
+
+def rebalance_summary(rebal: dict, post_risk: dict):
+    """Porównanie celów: gotówka i koszty po transakcjach, tracking error oraz ryzyko portfela po zmianach."""
+    idx = rebal["targets"].index
+    return pd.DataFrame({
+        "Gotówka po (PLN)": rebal["cash_after"],
+        "Koszty (PLN)": rebal["costs"],
+        "Tracking error (σ)": rebal["tracking_error"],
+        "Liczba zleceń": (rebal["orders"] != 0).sum(axis=1),
+        "Zmienność roczna po (σ)": pd.Series({k: post_risk[k]["annual_vol"] for k in idx}),
+        "VaR 1D po (PLN)": pd.Series({k: post_risk[k]["var_1d"] for k in idx}),
+        "ES 1D po (PLN)": pd.Series({k: post_risk[k]["es_1d"] for k in idx}),
+    }, index=idx)
@@ -1,33 +1,140 @@
 import numpy as np
 import pandas as pd
 from scipy.optimize import minimize
+from .factor_model import is_factor_model, cov_index, cov_matvec, cov_diag
 
-def shrink_cov(returns, eps=1e-8):
+def _nearest_psd(S, eps=1e-8):
+    """Przycina ujemne wartości własne (kowariancja z par obserwacji nie musi być dodatnio półokreślona)."""
+    vals, vecs = np.linalg.eigh((S + S.T) / 2.0)
+    return (vecs * np.clip(vals, eps, None)) @ vecs.T
+
+
+def fill_pairwise_cov(C, N, min_periods=20, eps=1e-8):
+    """
+    Domyka kowariancję z par obserwacji (C - kowariancje, N - liczba wspólnych obserwacji par):
+    - kowariancje z mniej niż min_periods wspólnych dni poza przekątną -> 0,
+    - wariancja zawsze z własnej próby spółki (także krótkiej, np. świeżo po debiucie),
+      a przy mniej niż 2 obserwacjach - mediana wariancji pozostałych spółek,
+    - wynik rzutowany na macierze dodatnio półokreślone.
+    """
+    C = np.array(C, dtype=float)
+    var = np.diag(C).copy()
+    known = np.isfinite(var) & (np.diag(N) >= 2)
+    var = np.where(known, var, np.median(var[known]) if known.any() else eps)
+
+    C[(np.asarray(N) < min_periods) | ~np.isfinite(C)] = 0.0
+    C[np.diag_indices_from(C)] = var
+    return _nearest_psd(C, eps)
+
+
+def shrink_cov(returns, eps=1e-8, pairwise=False, min_periods=20):
     """
     Czyścimy dane i liczymy kowariancję.
     Dodajemy mały 'ridge' na przekątnej (eps).
+
+    pairwise=True: zamiast usuwać każdy wiersz z brakiem, liczymy kowariancję z par dostępnych
+    obserwacji (co najmniej min_periods wspólnych dni, zob. fill_pairwise_cov) i rzutujemy wynik
+    na macierze dodatnio półokreślone.
     """
 
-    rs = returns.apply(pd.to_numeric, errors="coerce").dropna(how="any") # Czyścimy
+    rs = returns.apply(pd.to_numeric, errors="coerce")
+
+    if pairwise:
+        rs = rs.dropna(how="all")
+        M = rs.notna().to_numpy(dtype=float)
+        C = fill_pairwise_cov(rs.cov(min_periods=2).to_numpy(), M.T @ M, min_periods, eps)
+    else:
+        C = rs.dropna(how="any").cov().to_numpy() # Czyścimy
+
+    C[np.diag_indices_from(C)] += eps # Dla zabezpieczenia przed macierzą osobliwą
+    return pd.DataFrame(C, index=rs.columns, columns=rs.columns)
 
-    Sigma = rs.cov()
-    Sigma.values[np.diag_indices_from(Sigma)] += eps # Dla zabezpieczenia przed macierzą osobliwą
-    return Sigma
 
+def _rp_ccd(Sigma, tol=1e-10, max_sweeps=500):
+    """
+    Risk Parity metodą cyklicznego spadku po współrzędnych (Griveau-Billion i in.):
+    rozwiązujemy x_i (Σx)_i = 1/n po kolei dla każdej spółki, a potem normalizujemy.
 
-def risk_parity_weights(Sigma, w_min=0.0, w_max=1.0):
+    Dla modelu czynnikowego trzymamy y = Bᵀx, więc (Σx)_i = (B F y)_i + D_i x_i
+    kosztuje O(k²), a cały przebieg O(n·k²) zamiast O(n²).
+    """
+    diag = cov_diag(Sigma)
+    n = len(diag)
+    b = 1.0 / n
+    x = 1.0 / np.sqrt(diag)
+    x = x / x.sum()
+
+    factor = is_factor_model(Sigma)
+    if factor:
+        B, D = Sigma["B"], Sigma["D"]
+        BF = B @ Sigma["F"]
+        y = B.T @ x
+    else:
+        S = np.asarray(Sigma, dtype=float)
+        Sx = S @ x
+
+    for _ in range(max_sweeps):
+        for i in range(n):
+            Sx_i = BF[i] @ y + D[i] * x[i] if factor else Sx[i]
+            c = Sx_i - diag[i] * x[i]
+            new = (-c + np.sqrt(c * c + 4.0 * diag[i] * b)) / (2.0 * diag[i])
+            delta = new - x[i]
+            x[i] = new
+            if factor:
+                y += delta * B[i]
+            else:
+                Sx += delta * S[i] # Σ symetryczna: wiersz = kolumna, a wiersz jest ciągły w pamięci
+
+        rc = x * cov_matvec(Sigma, x)
+        if np.max(np.abs(rc - b)) <= tol:
+            break
+
+    return x / x.sum()
+
+
+def _clip_redistribute(w, w_min, w_max, tol=1e-12):
+    """
+    Przycina wagi do [w_min, w_max] i rozdziela nadwyżkę (niedobór) proporcjonalnie na spółki
+    bez aktywnego ograniczenia; powtarzamy, aż wszystkie wagi mieszczą się w przedziale (najwyżej n razy).
+    """
+    w = np.asarray(w, dtype=float) / np.sum(w)
+    fixed = np.zeros(len(w), dtype=bool)
+    for _ in range(len(w)):
+        low, high = w < w_min - tol, w > w_max + tol
+        if not (low | high).any():
+            break
+        w[low], w[high] = w_min, w_max
+        fixed |= low | high
+        free = ~fixed
+        if not free.any() or w[free].sum() <= 0:
+            break
+        w[free] *= (1.0 - w[fixed].sum()) / w[free].sum()
+    return w
+
+
+def risk_parity_weights(Sigma, w_min=0.0, w_max=1.0, method="slsqp"):
     """
     Minimalna RP: SLSQP na udziały w ryzyku, ograniczenia: sum(w)=1, w∈[w_min, w_max].
     Zwraca wagi jako Series w kolejności indeksu Sigma.
+
+    Sigma może być pełną macierzą albo modelem czynnikowym (factor_model.pca_factor_model).
+    method="ccd": szybki spadek po współrzędnych dla dużych uniwersów; ograniczenia
+    [w_min, w_max] narzucane są potem przez przycięcie z redystrybucją (_clip_redistribute).
     """
 
-    S = Sigma.values
-    n = S.shape[0] # Liczba spółek
+    index = cov_index(Sigma)
+
+    if method == "ccd":
+        w = _clip_redistribute(_rp_ccd(Sigma), w_min, w_max)
+        return pd.Series(w, index=index, name="w_RP")
+
+    S = Sigma if is_factor_model(Sigma) else np.asarray(Sigma, dtype=float)
+    n = len(index) # Liczba spółek
 
     x0 = np.full(n, 1.0 / n) # Startujemy od równych wag
 
     def obj(w):
-        Sw = S @ w # Udział w całkowitej wariancji dla każdego aktywa = funkcja celu
+        Sw = cov_matvec(S, w) # Udział w całkowitej wariancji dla każdego aktywa = funkcja celu
         sigma2 = max(w @ Sw, 1e-16) # Wariancja portfela
         rc_share = (w * Sw) / sigma2 # Udział ryzyka
         return np.sum((rc_share - 1.0 / n) ** 2) # Wszystkie udziały chcemy równe 1/n
@@ -45,4 +152,4 @@ def risk_parity_weights(Sigma, w_min=0.0, w_max=1.0):
     # Normalizujemy po przycięciu
     w = w / w.sum()
 
-    return pd.Series(w, index=Sigma.index, name="w_RP")
+    return pd.Series(w, index=index, name="w_RP")
@@ -30,12 +30,19 @@ def export_report_xlsx(
     cash_balance: float,
     var_conf: float,
     var_h: int,
+    risk_param: Optional[dict] = None,
     # Arkusze szczegółowe
     holdings: pd.Series,
     prices: pd.DataFrame,
     w_rp: pd.Series,
     bl_weights: Optional[pd.Series] = None,
     bl_weights_box: Optional[pd.Series] = None,
+    backtest: Optional[dict] = None,
+    var_backtest: Optional[dict] = None,
+    stress: Optional[dict] = None,
+    trades: Optional[pd.DataFrame] = None,
+    trades_summary: Optional[pd.DataFrame] = None,
+    coverage: Optional[pd.DataFrame] = None,
     # Config
     use_log: bool = True,
     risk_window_days: int = 252,
@@ -46,6 +53,13 @@ def export_report_xlsx(
     bl_omega_scale: float = 1.0,
     bl_box_lb: float = 0.05,
     bl_box_ub: float = 0.12,
+    calendar: Optional[str] = None,
+    ffill_limit: int = 0,
+    missing_policy: str = "complete",
+    cov_model: str = "sample",
+    factor_count: int = 5,
+    factor_market_ticker: Optional[str] = None,
+    rp_method: str = "slsqp",
     n_tickers: int = 0,
 ):
     """Zapisuje wszystkie arkusze raportu do pliku excel."""
@@ -67,6 +81,17 @@ def export_report_xlsx(
     ).T
     summary.columns = ["Wartość"]
 
+    if risk_param is not None:
+        param = pd.DataFrame(
+            {
+                f"VaR param. 1D @ {var_conf:.2%} (PLN)": [risk_param["var_1d"]],
+                f"ES  param. 1D @ {var_conf:.2%} (PLN)": [risk_param["es_1d"]],
+                f"VaR param. √h, h={var_h} (PLN)": [risk_param["var_h"]],
+            }
+        ).T
+        param.columns = ["Wartość"]
+        summary = pd.concat([summary, param])
+
     # Dane pomocnicze
     holdings_df = holdings.rename("Liczba akcji").to_frame()
     prices_tail = prices.tail(10)
@@ -94,6 +119,33 @@ def export_report_xlsx(
         _to_sheet(writer, "Holdings", holdings_df, index=True)
         _to_sheet(writer, "Prices_Tail", prices_tail, index=True)
 
+        # Jakość danych (opcjonalnie)
+        if coverage is not None:
+            _to_sheet(writer, "Data_Quality", coverage.round(4), index=True)
+
+        # Zlecenia (opcjonalnie)
+        if trades is not None:
+            _to_sheet(writer, "Trades", trades.round(4), index=True)
+        if trades_summary is not None:
+            _to_sheet(writer, "Trades_Summary", trades_summary.round(4), index=True)
+
+        # Walidacja VaR (opcjonalnie)
+        if var_backtest is not None:
+            _to_sheet(writer, "VaR_Backtest", var_backtest["summary"], index=True)
+            _to_sheet(writer, "VaR_Series", var_backtest["series"].round(6), index=True)
+
+        # Stress testy (opcjonalnie)
+        if stress is not None:
+            _to_sheet(writer, "Stress", stress["summary"].round(6), index=True)
+            _to_sheet(writer, "Stress_Detail", stress["detail"].round(2), index=True)
+
+        # Backtest (opcjonalnie)
+        if backtest is not None:
+            _to_sheet(writer, "Backtest", backtest["summary"].round(6), index=True)
+            nav = (1.0 + backtest["returns"]).cumprod()
+            nav.index.name = "Data"
+            _to_sheet(writer, "Backtest_NAV", nav.round(6), index=True)
+
         # Config
         config_df = pd.Series(
             {
@@ -111,6 +163,13 @@ def export_report_xlsx(
                 "bl_omega_scale": bl_omega_scale,
                 "bl_box_lb": bl_box_lb,
                 "bl_box_ub": bl_box_ub,
+                "calendar": calendar,
+                "ffill_limit": ffill_limit,
+                "missing_policy": missing_policy,
+                "cov_model": cov_model,
+                "factor_count": factor_count if cov_model == "factor" else None,
+                "factor_market_ticker": factor_market_ticker if cov_model == "factor" else None,
+                "rp_method": rp_method,
                 "liczba_tickerów": n_tickers,
             }
         ).to_frame("config_value")